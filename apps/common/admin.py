@@ -1,3 +1,4 @@
+import uuid
 from . import models
 from datetime import timedelta
 from django.contrib import admin
@@ -6,10 +7,100 @@ from django.utils import timezone
 from django.utils.html import format_html
 from django.contrib.admin import AdminSite
 from django.contrib.auth import get_user_model
+from django.core.exceptions import PermissionDenied
 from django.template.response import TemplateResponse
+from django.db import transaction
+from django.http import HttpResponseRedirect, StreamingHttpResponse
+from django.core.files.storage import default_storage
+from django.urls import path
+from .catalog import FORMATS, export_rows, get_import_result, render_rows
+from .tasks import import_catalog_upload
 from django.utils.translation import gettext_lazy as _
+from apps.payment.models import DailySalesRollup, Order
 
+DASHBOARD_DAYS = 30
+DASHBOARD_TOP = 10
 
 
+@admin.register(DailySalesRollup)
+class SalesDashboardAdmin(admin.ModelAdmin):
+    """Renders the sales dashboard from the daily rollups only, never from orders."""
 
+    def has_add_permission(self, request):
+        return False
 
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def changelist_view(self, request, extra_context=None):
+        since = timezone.localdate() - timedelta(days=DASHBOARD_DAYS - 1)
+        rollups = DailySalesRollup.objects.filter(date__gte=since)
+        approved = rollups.filter(status=Order.OrderStatus.APPROVED)
+        # Order counts are per product, so they only add up within one product.
+        totals = dict(amount=Sum('amount'), quantity=Sum('quantity'))
+        context = {
+            **self.admin_site.each_context(request),
+            **(extra_context or {}),
+            'title': _("Sales for the last %(days)s days") % {'days': DASHBOARD_DAYS},
+            'opts': self.model._meta,
+            'totals': approved.aggregate(**totals),
+            'by_day': approved.values('date').annotate(**totals).order_by('-date'),
+            'by_status': rollups.values('status').annotate(**totals).order_by('status'),
+            'by_provider': approved.values('provider').annotate(**totals).order_by('-amount'),
+            'by_branch': approved.values('branch__name').annotate(**totals).order_by('-amount'),
+            'top_products': approved.values('product__title').annotate(
+                orders=Sum('orders_count'), **totals
+            ).order_by('-amount')[:DASHBOARD_TOP],
+        }
+        return TemplateResponse(request, 'admin/sales_dashboard.html', context)
+
+
+@admin.register(models.Product)
+class ProductAdmin(admin.ModelAdmin):
+    list_display = ('id', 'title', 'category', 'price', 'quantity', 'on_sale')
+    list_filter = ('on_sale',)
+    search_fields = ('title', 'slug')
+    list_select_related = ('category',)
+    change_list_template = 'admin/catalog_change_list.html'
+
+    def get_urls(self):
+        return [
+            # The import runs in a Celery task with one transaction per chunk, so
+            # the upload request must not hold a request-long transaction.
+            path('import/', transaction.non_atomic_requests(self.admin_site.admin_view(self.import_view)),
+                 name='common_product_import'),
+            path('export/', self.admin_site.admin_view(self.export_view), name='common_product_export'),
+        ] + super().get_urls()
+
+    def import_view(self, request):
+        if not self.has_add_permission(request) or not self.has_change_permission(request):
+            raise PermissionDenied
+        context = {
+            **self.admin_site.each_context(request),
+            'title': _("Import products"),
+            'opts': self.model._meta,
+            'formats': FORMATS,
+        }
+        upload = request.FILES.get('file')
+        fmt = request.POST.get('format')
+        if request.method == 'POST' and upload and fmt in FORMATS:
+            job_id = uuid.uuid4().hex
+            name = default_storage.save(f'imports/{job_id}.{fmt}', upload)
+            import_catalog_upload.delay(name, fmt, job_id)
+            return HttpResponseRedirect(f'{request.path}?job={job_id}')
+        if request.GET.get('job'):
+            context['result'] = get_import_result(request.GET['job'])
+            context['pending'] = context['result'] is None
+        return TemplateResponse(request, 'admin/catalog_import.html', context)
+
+    def export_view(self, request):
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        fmt = request.GET.get('format') if request.GET.get('format') in FORMATS else 'jsonl'
+        response = StreamingHttpResponse(render_rows(export_rows(), fmt),
+                                         content_type='text/csv' if fmt == 'csv' else 'application/jsonl')
+        response['Content-Disposition'] = f'attachment; filename="catalog.{fmt}"'
+        return response
@@ -0,0 +1,11 @@
+from django.urls import path
+from . import async_views
+
+urlpatterns = [
+    path('banners/', async_views.BannerListView.as_view(), name='async-banner-list'),
+    path('brands/', async_views.BrandListView.as_view(), name='async-brand-list'),
+    path('sections/', async_views.SectionListView.as_view(), name='async-section-list'),
+    path('categories/', async_views.CategoryMenuView.as_view(), name='async-category-menu'),
+    path('products/', async_views.ProductListView.as_view(), name='async-product-list'),
+    path('products/<slug:slug>/', async_views.ProductDetailView.as_view(), name='async-product-detail'),
+]
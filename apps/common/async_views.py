@@ -0,0 +1,153 @@
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.http import Http404, JsonResponse
+from django.views import View
+from rest_framework.filters import SearchFilter
+from rest_framework.request import Request
+from . import models, serializers
+from .cache import acached_payload, aget_version, uri_suffix
+from .conditional import make_validators, not_modified_or_none, set_validators, timestamp_stats
+from .counters import record_product_view
+from .pagination import KeysetPagination
+from .views import PRODUCT_NAMESPACES, ProductListAPIView
+
+
+class AsyncCatalogView(View):
+    """
+    Async counterpart of the catalog read endpoints, served under ASGI. The
+    payloads match the DRF views, including the conditional GET validators.
+    Subclasses build the body in ``get_payload``.
+    """
+    http_method_names = ['get', 'head', 'options']
+    conditional_namespaces = ()
+    conditional_timestamps = False
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # Read-only, and ATOMIC_REQUESTS can't wrap async views.
+        return transaction.non_atomic_requests(super().as_view(**initkwargs))
+
+    def get_conditional_queryset(self):
+        raise NotImplementedError
+
+    async def get_conditional_stats(self):
+        return await self.get_conditional_queryset().order_by().aaggregate(**timestamp_stats())
+
+    async def get_validators(self, request):
+        parts = [request.get_full_path(), 'application/json']
+        versions = [f'{namespace}:{await aget_version(namespace)}' for namespace in self.conditional_namespaces]
+        stats = await self.get_conditional_stats() if self.conditional_timestamps else None
+        return make_validators(parts, versions, stats)
+
+    async def get(self, request, *args, **kwargs):
+        etag, last_modified = await self.get_validators(request)
+        response = not_modified_or_none(request, etag, last_modified)
+        if response is None:
+            try:
+                response = JsonResponse(await self.get_payload(request, *args, **kwargs), safe=False)
+            except Http404 as exc:
+                # Same body as DRF's exception handler.
+                return JsonResponse({'detail': str(exc) or 'Not found.'}, status=404)
+        return set_validators(response, etag, last_modified)
+
+    async def get_payload(self, request, *args, **kwargs):
+        raise NotImplementedError
+
+
+class AsyncCachedListView(AsyncCatalogView):
+    """Lists ``queryset`` from the catalog cache, paginated by keyset unless ``paginate`` is off."""
+    queryset = None
+    serializer_class = None
+    cache_namespace = None
+    paginate = False
+    keyset_ordering = None
+
+    @property
+    def conditional_namespaces(self):
+        return (self.cache_namespace,)
+
+    async def get_payload(self, request, *args, **kwargs):
+        async def build():
+            if not self.paginate:
+                rows = [row async for row in self.queryset.all()]
+                return self.serializer_class(rows, many=True, context={'request': request}).data
+            paginator = KeysetPagination()
+            rows = await paginator.apaginate_queryset(self.queryset.all(), request, self)
+            data = self.serializer_class(rows, many=True, context={'request': request}).data
+            return paginator.get_paginated_payload(data)
+        return await acached_payload(self.cache_namespace, uri_suffix(request), build)
+
+
+class BannerListView(AsyncCachedListView):
+    queryset = models.Banner.objects.filter(banner_type='banner')
+    serializer_class = serializers.BannerListSerializers
+    cache_namespace = 'banner'
+    paginate = True
+    keyset_ordering = ('order', 'id')
+
+
+class BrandListView(AsyncCachedListView):
+    queryset = models.Brand.objects.order_by('order')
+    serializer_class = serializers.BrandListSerializers
+    cache_namespace = 'brand'
+
+
+class SectionListView(AsyncCachedListView):
+    queryset = models.Section.objects.order_by('id')
+    serializer_class = serializers.SectionListSerializers
+    cache_namespace = 'section'
+
+
+class CategoryMenuView(AsyncCatalogView):
+    conditional_namespaces = ('category',)
+
+    async def get_payload(self, request, *args, **kwargs):
+        return await models.Category.objects.amenu_tree()
+
+
+class ProductListView(AsyncCatalogView):
+    """Filters with the ``filterset_class`` and ``search_fields`` of ``ProductListAPIView``."""
+    conditional_namespaces = PRODUCT_NAMESPACES
+
+    async def get(self, request, *args, **kwargs):
+        filterset = ProductListAPIView.filterset_class(request.GET, models.Product.objects.with_card_data(),
+                                                       request=request)
+        # Validating a choice filter looks the value up in the database.
+        if not await sync_to_async(filterset.is_valid)():
+            return JsonResponse({name: list(errors) for name, errors in filterset.errors.items()}, status=400)
+        self.queryset = SearchFilter().filter_queryset(Request(request), filterset.qs, ProductListAPIView)
+        return await super().get(request, *args, **kwargs)
+
+    async def get_payload(self, request, *args, **kwargs):
+        queryset = self.queryset
+        paginator = KeysetPagination()
+        rows = await paginator.apaginate_queryset(queryset, request, self)
+        data = serializers.ProductListSerializers(rows, many=True, context={'request': request}).data
+        return paginator.get_paginated_payload(data)
+
+
+class ProductDetailView(AsyncCatalogView):
+    conditional_namespaces = PRODUCT_NAMESPACES
+    conditional_timestamps = True
+
+    def get_conditional_queryset(self):
+        return models.Product.objects.filter(slug=self.kwargs['slug'])
+
+    async def get_conditional_stats(self):
+        row = await self.get_conditional_queryset().order_by().values('pk', 'update_at').afirst()
+        self.product_id = row['pk'] if row else None
+        return {'latest': row['update_at'] if row else None, 'count': int(bool(row))}
+
+    async def get(self, request, *args, **kwargs):
+        response = await super().get(request, *args, **kwargs)
+        # A revalidated (304) read is a view as well.
+        if self.product_id is not None and response.status_code in (200, 304):
+            await sync_to_async(record_product_view)(self.product_id)
+        return response
+
+    async def get_payload(self, request, slug, *args, **kwargs):
+        try:
+            product = await models.Product.objects.with_detail_data().aget(slug=slug)
+        except models.Product.DoesNotExist:
+            raise Http404('No Product matches the given query.')
+        return serializers.ProductDetailSerializers(product, context={'request': request}).data
@@ -0,0 +1,343 @@
+import io
+import csv
+import json
+from decimal import InvalidOperation
+from itertools import islice
+from django.db import transaction
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from django.utils.text import slugify
+from django.core.exceptions import ValidationError
+from . import facets, images, search
+from .cache import bump_version_on_commit
+from .feeds import schedule_section_feeds
+from .slug import bulk_unique_slugify
+from .models import Category, Gallery, Product, ProductCharacteristics, Section
+
+FORMATS = ('csv', 'jsonl')
+IMPORT_CHUNK_SIZE = 1000
+EXPORT_CHUNK_SIZE = 2000
+MAX_REPORTED_ERRORS = 100
+IMPORT_RESULT_TIMEOUT = 60 * 60 * 24
+
+EXPORT_FIELDS = (
+    'slug', 'title', 'category', 'price', 'discount', 'quantity', 'on_sale', 'is_many',
+    'description', 'video_url', 'body', 'characteristics', 'images',
+)
+TEXT_FIELDS = ('title', 'description', 'video_url', 'body')
+INT_FIELDS = ('discount', 'quantity')
+BOOL_FIELDS = ('on_sale', 'is_many')
+# Written as JSON inside a single CSV column.
+LIST_FIELDS = ('characteristics', 'images')
+
+
+def read_rows(stream, fmt):
+    """Yields ``(line_number, row)`` pairs from a text stream in CSV or JSONL."""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    else:
+        for line_number, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                yield line_number, json.loads(line)
+            except ValueError as exc:
+                # Reported against the line by the importer like any other bad row.
+                yield line_number, ValueError(f"invalid JSON: {exc}")
+
+
+def _parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def _clean(model, name, value):
+    """Runs the model field's own checks, so bad values never reach the database."""
+    try:
+        return model._meta.get_field(name).clean(value, None)
+    except ValidationError as exc:
+        raise ValueError(f"{name}: {' '.join(exc.messages)}")
+
+
+def _clean_text(model, name, value):
+    value = str(value)
+    max_length = model._meta.get_field(name).max_length
+    if max_length and len(value) > max_length:
+        raise ValueError(f"{name}: longer than {max_length} characters")
+    return value
+
+
+def _parse_list(name, value):
+    items = json.loads(value) if isinstance(value, str) else value
+    if not isinstance(items, list):
+        raise ValueError(f"{name}: expected a list")
+    if name == 'characteristics':
+        return [(_clean_text(ProductCharacteristics, 'title', item['title']),
+                 _clean_text(ProductCharacteristics, 'value', item['value'])) for item in items]
+    return [_clean_text(Gallery, 'image', item) for item in items]
+
+
+def _parse_row(row, categories):
+    """Converts a raw row into model field values, leaving out absent columns."""
+    if isinstance(row, Exception):
+        raise row
+    if not isinstance(row, dict):
+        raise ValueError("row is not an object")
+    fields = {}
+    for name in TEXT_FIELDS:
+        if row.get(name) is not None:
+            fields[name] = _clean_text(Product, name, row[name])
+    if fields.get('title') == '':
+        raise ValueError("title: this field cannot be blank")
+    for name in INT_FIELDS + BOOL_FIELDS + LIST_FIELDS + ('price', 'category'):
+        value = row.get(name)
+        if value is None or value == '':
+            continue
+        if name in INT_FIELDS:
+            fields[name] = _clean(Product, name, value)
+        elif name in BOOL_FIELDS:
+            fields[name] = _parse_bool(value)
+        elif name in LIST_FIELDS:
+            fields[name] = _parse_list(name, value)
+        elif name == 'price':
+            fields[name] = _clean(Product, name, str(value))
+        elif value in categories:
+            fields[name] = categories[value]
+        else:
+            raise ValueError(f"unknown category '{value}'")
+    return fields
+
+
+class CatalogImport:
+    """
+    Upserts products on ``slug`` from an iterable of rows, one transaction per
+    chunk. Rows without a slug always create a product. Characteristics and
+    images are synced only for the rows that carry them.
+    """
+
+    def __init__(self, chunk_size=IMPORT_CHUNK_SIZE):
+        from apps.payment.models import Settings
+
+        self.chunk_size = chunk_size
+        self.categories = {category.slug: category for category in Category.objects.all()}
+        self.categories_by_id = {category.pk: category for category in self.categories.values()}
+        self.rate = Settings.get_solo().usd_to_uzs_rate
+        self.created = self.updated = self.skipped = 0
+        self.errors = []
+        self.failed = None
+
+    def run(self, rows):
+        rows = iter(rows)
+        while chunk := list(islice(rows, self.chunk_size)):
+            with transaction.atomic():
+                self._import_chunk(chunk)
+        return self
+
+    def summary(self):
+        return {'created': self.created, 'updated': self.updated, 'skipped': self.skipped, 'errors': self.errors,
+                'failed': self.failed}
+
+    def _error(self, line_number, message):
+        self.skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line_number, message))
+
+    def _import_chunk(self, chunk):
+        keyed, unkeyed = {}, []
+        for line_number, row in chunk:
+            try:
+                fields = _parse_row(row, self.categories)
+                slug = _clean_text(Product, 'slug', slugify(str(row.get('slug') or '')))
+            except (KeyError, ValueError, TypeError, InvalidOperation) as exc:
+                self._error(line_number, str(exc))
+                continue
+            if slug:
+                # A later row for the same slug wins.
+                keyed[slug] = (line_number, fields)
+            else:
+                unkeyed.append((line_number, fields))
+
+        existing = Product.objects.in_bulk(list(keyed), field_name='slug')
+        to_update, keyed_new, unkeyed_new, extras = [], [], [], []
+        update_fields = {'update_at'}
+        # Products moved to another category leave the old one's facets stale too.
+        moved_from = {product.category_id for product in existing.values()}
+        for slug, (line_number, fields) in keyed.items():
+            product = existing.get(slug)
+            if product is None:
+                product = self._new_product(line_number, fields, slug=slug)
+                if product is not None:
+                    keyed_new.append(product)
+                    extras.append((product, fields))
+                continue
+            update_fields.update(self._apply(product, fields))
+            to_update.append(product)
+            extras.append((product, fields))
+        for line_number, fields in unkeyed:
+            product = self._new_product(line_number, fields)
+            if product is not None:
+                unkeyed_new.append(product)
+                extras.append((product, fields))
+
+        # Explicit slugs go in first so generated ones can't collide with them.
+        to_create = Product.objects.bulk_create(keyed_new)
+        to_create += Product.objects.bulk_create(bulk_unique_slugify(unkeyed_new))
+        if to_update:
+            now = timezone.now()
+            for product in to_update:
+                product.update_at = now
+            Product.objects.bulk_update(to_update, sorted(update_fields))
+        self.created += len(to_create)
+        self.updated += len(to_update)
+
+        self._sync_characteristics(extras)
+        self._sync_images(extras)
+        self._refresh(to_create + to_update, [product.pk for product in to_update], moved_from)
+
+    def _new_product(self, line_number, fields, slug=''):
+        missing = [name for name in ('title', 'price', 'category') if name not in fields]
+        if missing:
+            self._error(line_number, f"missing {', '.join(missing)}")
+            return None
+        product = Product(slug=slug)
+        self._apply(product, fields)
+        return product
+
+    def _apply(self, product, fields):
+        names = set()
+        for name, value in fields.items():
+            if name in LIST_FIELDS:
+                continue
+            setattr(product, name, value)
+            names.add(name)
+        if 'price' in fields and self.rate:
+            product.price_uzs = product.price * self.rate
+            names.add('price_uzs')
+        return names
+
+    def _sync_characteristics(self, extras):
+        wanted = {product.pk: fields['characteristics'] for product, fields in extras if 'characteristics' in fields}
+        if not wanted:
+            return
+        current = {}
+        for pk, product_id, title, value in ProductCharacteristics.objects.filter(
+                product_id__in=wanted).values_list('pk', 'product_id', 'title', 'value'):
+            current.setdefault(product_id, {})[(title, value)] = pk
+        stale, fresh = [], []
+        for product_id, pairs in wanted.items():
+            have = current.get(product_id, {})
+            stale += [pk for pair, pk in have.items() if pair not in pairs]
+            fresh += [ProductCharacteristics(product_id=product_id, title=title, value=value)
+                      for title, value in dict.fromkeys(pairs) if (title, value) not in have]
+        if stale:
+            # Unchanged characteristics are kept, so re-imports delete nothing.
+            ProductCharacteristics.objects.filter(pk__in=stale).delete()
+        ProductCharacteristics.objects.bulk_create(fresh)
+
+    def _sync_images(self, extras):
+        wanted = {product.pk: fields['images'] for product, fields in extras if 'images' in fields}
+        if not wanted:
+            return
+        have = set(Gallery.objects.filter(product_id__in=wanted).values_list('product_id', 'image'))
+        galleries = Gallery.objects.bulk_create([
+            Gallery(product_id=product_id, image=name)
+            for product_id, names in wanted.items() for name in dict.fromkeys(names)
+            if (product_id, name) not in have
+        ])
+        for gallery in galleries:
+            images.schedule_variants(gallery, 'image')
+
+    def _refresh(self, products, updated_ids, moved_from):
+        # bulk_create/bulk_update skip the model signals, so do their work per chunk.
+        if not products:
+            return
+        product_ids = [product.pk for product in products]
+        transaction.on_commit(lambda: search.index_products(product_ids))
+        for category_id in moved_from | {product.category_id for product in products}:
+            if category_id in self.categories_by_id:
+                facets.invalidate_facets(self.categories_by_id[category_id])
+        if updated_ids:
+            schedule_section_feeds(Section.objects.filter(products__in=updated_ids).values_list('code', flat=True))
+        bump_version_on_commit('product')
+
+
+def import_catalog(rows, chunk_size=IMPORT_CHUNK_SIZE):
+    return CatalogImport(chunk_size).run(rows)
+
+
+def _import_result_key(job_id):
+    return f'catalog_import:{job_id}'
+
+
+def import_catalog_file(name, fmt, job_id):
+    """
+    Imports an uploaded file from storage and keeps its summary for the admin.
+    Chunks committed before a failure stay imported; the summary says where
+    it stopped and the error is re-raised for the task.
+    """
+    importer = CatalogImport()
+    try:
+        with default_storage.open(name, 'rb') as raw:
+            stream = io.TextIOWrapper(raw, encoding='utf-8-sig', newline='')
+            importer.run(read_rows(stream, fmt))
+    except Exception as exc:
+        importer.failed = str(exc) or exc.__class__.__name__
+        raise
+    finally:
+        default_storage.delete(name)
+        cache.set(_import_result_key(job_id), importer.summary(), IMPORT_RESULT_TIMEOUT)
+    return importer.summary()
+
+
+def get_import_result(job_id):
+    return cache.get(_import_result_key(job_id))
+
+
+def export_rows(queryset=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yields the catalog as import-compatible rows, holding one chunk in memory."""
+    if queryset is None:
+        queryset = Product.objects.all()
+    queryset = queryset.select_related('category').prefetch_related('characteristics', 'galleries').order_by('pk')
+    for product in queryset.iterator(chunk_size=chunk_size):
+        yield {
+            'slug': product.slug,
+            'title': product.title,
+            'category': product.category.slug,
+            'price': str(product.price),
+            'discount': product.discount,
+            'quantity': product.quantity,
+            'on_sale': product.on_sale,
+            'is_many': product.is_many,
+            'description': product.description,
+            'video_url': product.video_url,
+            'body': str(product.body),
+            'characteristics': [{'title': item.title, 'value': item.value}
+                                for item in product.characteristics.all()],
+            'images': [gallery.image.name for gallery in product.galleries.all()],
+        }
+
+
+class Echo:
+    """A write-only file-like object that hands back what is written to it."""
+
+    def write(self, value):
+        return value
+
+
+def render_rows(rows, fmt):
+    """Yields ``rows`` as text lines, ready for a streaming response or a file."""
+    if fmt == 'csv':
+        writer = csv.writer(Echo())
+        yield writer.writerow(EXPORT_FIELDS)
+        for row in rows:
+            yield writer.writerow([
+                json.dumps(row[name], ensure_ascii=False) if name in LIST_FIELDS else row[name]
+                for name in EXPORT_FIELDS
+            ])
+    else:
+        for row in rows:
+            yield json.dumps(row, ensure_ascii=False) + '\n'
@@ -0,0 +1,79 @@
+import hashlib
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from .cache import get_version
+
+
+def make_validators(parts, versions=(), stats=None):
+    """
+    Returns an ``(etag, last_modified)`` pair from the identifying ``parts``,
+    the namespace ``versions`` and, optionally, the ``latest``/``count``
+    aggregate of a queryset. A version bump carries no time, so Last-Modified
+    is only sent when ``latest`` is the sole thing that can change the body.
+    """
+    last_modified = None
+    if stats is not None:
+        if stats['latest'] and not versions:
+            last_modified = int(stats['latest'].timestamp())
+        parts = [*parts, str(stats['latest']), str(stats['count'])]
+    return f'"{hashlib.md5("|".join([*parts, *versions]).encode()).hexdigest()}"', last_modified
+
+
+def timestamp_stats():
+    return dict(latest=Max('update_at'), count=Count('pk'))
+
+
+def not_modified_or_none(request, etag, last_modified):
+    return get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+
+def set_validators(response, etag, last_modified):
+    if 200 <= response.status_code < 300 or response.status_code == 304:
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+class ConditionalGetMixin:
+    """
+    Answers ``If-None-Match``/``If-Modified-Since`` with a 304 before anything
+    is serialized. The ETag covers the request URI, the versions of
+    ``conditional_namespaces`` (``cache_namespace`` by default) and, with
+    ``conditional_timestamps``, the latest ``update_at`` and row count of the
+    filtered queryset. The aggregate scans every matching row, so lists should
+    rely on namespaces alone. Last-Modified is left out whenever namespaces
+    contribute, since their bumps (a new image, a reprice) carry no time.
+    """
+    conditional_namespaces = ()
+    conditional_timestamps = False
+
+    def get_conditional_namespaces(self):
+        if self.conditional_namespaces:
+            return self.conditional_namespaces
+        namespace = getattr(self, 'cache_namespace', None)
+        return (namespace,) if namespace else ()
+
+    def get_conditional_queryset(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = getattr(self, 'lookup_url_kwarg', None) or getattr(self, 'lookup_field', None)
+        if lookup_url_kwarg in self.kwargs:
+            queryset = queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        return queryset
+
+    def get_conditional_stats(self):
+        return self.get_conditional_queryset().order_by().aggregate(**timestamp_stats())
+
+    def get_validators(self, request):
+        parts = [request.get_full_path(), request.accepted_media_type]
+        versions = [f'{namespace}:{get_version(namespace)}' for namespace in self.get_conditional_namespaces()]
+        stats = self.get_conditional_stats() if self.conditional_timestamps else None
+        return make_validators(parts, versions, stats)
+
+    def get(self, request, *args, **kwargs):
+        etag, last_modified = self.get_validators(request)
+        response = not_modified_or_none(request, etag, last_modified)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        return set_validators(response, etag, last_modified)
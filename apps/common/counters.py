@@ -0,0 +1,44 @@
+from redis import RedisError, ResponseError
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from .redis_client import get_redis
+
+PRODUCT_VIEWS_KEY = 'counters:product_views'
+PRODUCT_VIEWS_FLUSHING_KEY = 'counters:product_views:flushing'
+FLUSH_BATCH_SIZE = 500
+
+
+def record_product_view(product_id):
+    try:
+        get_redis().hincrby(PRODUCT_VIEWS_KEY, product_id, 1)
+    except RedisError:
+        # A lost view is better than a failed product page.
+        pass
+
+
+def flush_product_views():
+    """
+    Moves the buffered view counters into ``Product.view_count``. The live hash
+    is renamed first so new views keep counting while the snapshot is written
+    in batched UPDATEs; a snapshot left behind by a crashed run is flushed
+    before a new one is taken.
+    """
+    from .models import Product
+
+    client = get_redis()
+    if not client.exists(PRODUCT_VIEWS_FLUSHING_KEY):
+        try:
+            client.rename(PRODUCT_VIEWS_KEY, PRODUCT_VIEWS_FLUSHING_KEY)
+        except ResponseError:
+            # Nothing was viewed since the last flush.
+            return 0
+    counts = [(int(pk), int(count)) for pk, count in client.hgetall(PRODUCT_VIEWS_FLUSHING_KEY).items()]
+    for i in range(0, len(counts), FLUSH_BATCH_SIZE):
+        batch = counts[i:i + FLUSH_BATCH_SIZE]
+        with transaction.atomic():
+            Product.objects.filter(pk__in=[pk for pk, _ in batch]).update(
+                view_count=F('view_count') + Case(*[When(pk=pk, then=Value(count)) for pk, count in batch])
+            )
+        client.hdel(PRODUCT_VIEWS_FLUSHING_KEY, *[pk for pk, _ in batch])
+    client.delete(PRODUCT_VIEWS_FLUSHING_KEY)
+    return len(counts)
@@ -0,0 +1,120 @@
+from .cache import bump_version_on_commit, cached_payload
+
+FACET_INDEX_TIMEOUT = 60 * 60
+
+
+def normalize(text):
+    return ' '.join(text.split()).casefold()
+
+
+def _namespace(category_id):
+    return f'facet_{category_id}'
+
+
+def _bitmap(positions, size):
+    bits = bytearray((size + 7) // 8)
+    for position in positions:
+        bits[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(bits, 'little')
+
+
+def _positions(bitmap):
+    positions, offset = [], 0
+    for byte in bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little'):
+        while byte:
+            low = byte & -byte
+            positions.append(offset + low.bit_length() - 1)
+            byte ^= low
+        offset += 8
+    return positions
+
+
+def build_facet_index(category):
+    """
+    Maps every normalized (attribute, value) pair of the on-sale products in a
+    category subtree to a bitmap over the subtree's product ids.
+    """
+    from .models import Product, ProductCharacteristics
+
+    product_ids = list(Product.objects.filter(category__path__startswith=category.path, on_sale=True)
+                       .order_by('pk').values_list('pk', flat=True))
+    position = {pk: i for i, pk in enumerate(product_ids)}
+    attributes = {}
+    rows = ProductCharacteristics.objects.filter(
+        product__category__path__startswith=category.path, product__on_sale=True
+    ).values_list('product_id', 'title', 'value')
+    for product_id, title, value in rows.iterator(chunk_size=5000):
+        attribute = attributes.setdefault(normalize(title), {'label': title.strip(), 'values': {}})
+        entry = attribute['values'].setdefault(normalize(value), {'label': value.strip(), 'positions': []})
+        entry['positions'].append(position[product_id])
+    for attribute in attributes.values():
+        for entry in attribute['values'].values():
+            entry['bitmap'] = _bitmap(entry.pop('positions'), len(product_ids))
+    return {'ids': product_ids, 'attributes': attributes}
+
+
+def get_facet_index(category):
+    return cached_payload(_namespace(category.pk), 'index', lambda: build_facet_index(category),
+                          timeout=FACET_INDEX_TIMEOUT)
+
+
+def invalidate_facets(category):
+    # Indexes cover whole subtrees, so every ancestor is affected as well.
+    invalidate_facet_ids(category.ancestor_ids + [category.pk])
+
+
+def invalidate_facet_ids(category_ids):
+    for category_id in set(category_ids):
+        bump_version_on_commit(_namespace(category_id))
+
+
+def parse_selection(values):
+    """Turns ``["RAM:8GB", "Color:Black"]`` into ``{"ram": {"8gb"}, "color": {"black"}}``."""
+    selected = {}
+    for value in values:
+        attribute, separator, option = value.partition(':')
+        if separator and attribute.strip() and option.strip():
+            selected.setdefault(normalize(attribute), set()).add(normalize(option))
+    return selected
+
+
+def facet_search(category, selected):
+    """
+    Intersects the selected facets in memory. Values of one attribute are
+    OR-ed, attributes are AND-ed, and each attribute's counts ignore its own
+    selection so other options stay visible. Returns the matching product ids
+    and the per-value counts.
+    """
+    index = get_facet_index(category)
+    everything = (1 << len(index['ids'])) - 1
+    masks = {}
+    for attribute_key, value_keys in selected.items():
+        values = index['attributes'].get(attribute_key, {'values': {}})['values']
+        mask = 0
+        for value_key in value_keys:
+            mask |= values[value_key]['bitmap'] if value_key in values else 0
+        masks[attribute_key] = mask
+
+    def intersect(skip=None):
+        result = everything
+        for attribute_key, mask in masks.items():
+            if attribute_key != skip:
+                result &= mask
+        return result
+
+    facets = []
+    for attribute_key, attribute in index['attributes'].items():
+        others = intersect(skip=attribute_key)
+        facets.append({
+            'attribute': attribute['label'],
+            'values': [
+                {
+                    'value': entry['label'],
+                    'count': (entry['bitmap'] & others).bit_count(),
+                    'selected': value_key in selected.get(attribute_key, ()),
+                }
+                for value_key, entry in attribute['values'].items()
+            ],
+        })
+    ids = [index['ids'][position] for position in _positions(intersect())]
+    return ids, facets
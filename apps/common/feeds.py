@@ -0,0 +1,43 @@
+from django.db import transaction
+from django.core.cache import cache
+
+SECTION_FEED_TIMEOUT = 60 * 60 * 24
+
+
+def _feed_key(code):
+    # Not versioned: feeds are rebuilt per section when their products change,
+    # and the rate task reschedules every feed after a catalog-wide reprice.
+    return f"section_feed:{code}"
+
+
+def build_section_feed(code):
+    """Serializes the product cards of one section and stores the payload."""
+    from . import models, serializers
+
+    section = models.Section.objects.filter(code=code).first()
+    if section is None:
+        cache.delete(_feed_key(code))
+        return None
+    products = models.Product.objects.with_card_data().filter(product_sections=section, on_sale=True).order_by('-id')
+    payload = {
+        'code': section.code,
+        'name': section.name,
+        'products': serializers.SectionProductSerializers(products, many=True).data,
+    }
+    cache.set(_feed_key(code), payload, SECTION_FEED_TIMEOUT)
+    return payload
+
+
+def get_section_feed(code):
+    payload = cache.get(_feed_key(code))
+    if payload is None:
+        payload = build_section_feed(code)
+    return payload
+
+
+def schedule_section_feeds(codes):
+    from .tasks import rebuild_section_feeds
+
+    codes = sorted(set(code for code in codes if code))
+    if codes:
+        transaction.on_commit(lambda: rebuild_section_feeds.delay(codes))
@@ -0,0 +1,76 @@
+from io import BytesIO
+from PIL import Image, ImageOps
+from django.db import transaction
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+VARIANT_WIDTHS = (320, 640, 1280)
+VARIANT_QUALITY = 80
+VARIANTS_DIR = 'variants'
+
+
+def variants_field_name(field_name):
+    return f'{field_name}_variants'
+
+
+def has_current_variants(name, variants):
+    return bool(name) and bool(variants) and variants.get('source') == name
+
+
+def build_srcset(name, variants, request=None):
+    """
+    Returns a ``srcset`` of the WebP variants of ``name``, or ``None`` while the
+    variants are missing or belong to a previous upload.
+    """
+    if not has_current_variants(name, variants):
+        return None
+    urls = []
+    for width, variant in sorted(variants['webp'].items(), key=lambda item: int(item[0])):
+        url = default_storage.url(variant)
+        urls.append(f'{request.build_absolute_uri(url) if request else url} {width}w')
+    return ', '.join(urls)
+
+
+def schedule_variants(instance, field_name):
+    from .tasks import generate_image_variants
+
+    name = getattr(instance, field_name).name
+    if name and not has_current_variants(name, getattr(instance, variants_field_name(field_name))):
+        transaction.on_commit(lambda: generate_image_variants.delay(instance._meta.label, instance.pk, field_name))
+
+
+def _variant_name(name, width):
+    # The extension stays in, so photo.jpg and photo.png get separate variants.
+    return f'{VARIANTS_DIR}/{name}-{width}w.webp'
+
+
+def render_variants(name):
+    """Writes resized WebP copies of a stored image and returns their names by width."""
+    with default_storage.open(name) as file:
+        image = ImageOps.exif_transpose(Image.open(file))
+        image.load()
+    image = image.convert('RGBA' if image.mode in ('RGBA', 'LA', 'P') else 'RGB')
+    widths = sorted({width for width in VARIANT_WIDTHS if width < image.width} | {min(image.width, VARIANT_WIDTHS[-1])})
+    variants = {}
+    for width in widths:
+        resized = image.copy()
+        resized.thumbnail((width, image.height))
+        buffer = BytesIO()
+        resized.save(buffer, 'WEBP', quality=VARIANT_QUALITY)
+        variant = _variant_name(name, width)
+        default_storage.delete(variant)
+        variants[str(width)] = default_storage.save(variant, ContentFile(buffer.getvalue()))
+    return {'source': name, 'webp': variants}
+
+
+def generate_variants(model, pk, field_name):
+    instance = model._default_manager.filter(pk=pk).first()
+    name = getattr(instance, field_name).name if instance else None
+    if not name:
+        return None
+    variants = render_variants(name)
+    # Only store them if the image wasn't replaced while rendering.
+    updated = model._default_manager.filter(pk=pk, **{field_name: name}).update(
+        **{variants_field_name(field_name): variants}
+    )
+    return variants if updated else None
@@ -0,0 +1,58 @@
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client
+from django.urls import reverse
+from apps.common.models import Product
+
+ENDPOINTS = ('banner-list', 'brand-list', 'section-list', 'category-menu', 'product-list', 'product-detail')
+
+
+class Command(BaseCommand):
+    help = "Compares in-process throughput of the sync and async catalog endpoints"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help="Requests per endpoint and path")
+        parser.add_argument('--concurrency', type=int, default=20)
+        parser.add_argument('--endpoint', action='append', choices=ENDPOINTS,
+                            help="Limit the run to these endpoints; repeatable")
+
+    def handle(self, *args, requests, concurrency, endpoint, **options):
+        product = Product.objects.order_by('pk').first()
+        if product is None:
+            raise CommandError("The catalog has no products to benchmark")
+        self.stdout.write(f"{'endpoint':<16}{'sync req/s':>12}{'async req/s':>13}")
+        for name in endpoint or ENDPOINTS:
+            args = (product.slug,) if name == 'product-detail' else ()
+            sync_rate = self.run_sync(reverse(name, args=args), requests, concurrency)
+            async_rate = asyncio.run(self.run_async(reverse(f'async-{name}', args=args), requests, concurrency))
+            self.stdout.write(f"{name:<16}{sync_rate:>12.1f}{async_rate:>13.1f}")
+
+    def run_sync(self, url, requests, concurrency):
+        # The WSGI path needs a thread per in-flight request.
+        def fetch(_):
+            return Client().get(url).status_code
+
+        with ThreadPoolExecutor(concurrency) as pool:
+            started = time.perf_counter()
+            statuses = list(pool.map(fetch, range(requests)))
+        return self.rate(url, statuses, started)
+
+    async def run_async(self, url, requests, concurrency):
+        client, semaphore = AsyncClient(), asyncio.Semaphore(concurrency)
+
+        async def fetch():
+            async with semaphore:
+                return (await client.get(url)).status_code
+
+        started = time.perf_counter()
+        statuses = await asyncio.gather(*(fetch() for _ in range(requests)))
+        return self.rate(url, statuses, started)
+
+    def rate(self, url, statuses, started):
+        elapsed = time.perf_counter() - started
+        failed = [status for status in statuses if status != 200]
+        if failed:
+            raise CommandError(f"{url} answered {failed[0]} to {len(failed)} requests")
+        return len(statuses) / elapsed
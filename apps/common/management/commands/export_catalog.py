@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from apps.common.catalog import EXPORT_CHUNK_SIZE, FORMATS, export_rows, render_rows
+
+
+class Command(BaseCommand):
+    help = "Streams the product catalog out as CSV or JSONL"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', help="Defaults to stdout")
+        parser.add_argument('--format', choices=FORMATS, default='jsonl')
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, path, format, chunk_size, **options):
+        stream = open(path, 'w', encoding='utf-8', newline='') if path else self.stdout
+        try:
+            stream.writelines(render_rows(export_rows(chunk_size=chunk_size), format))
+        finally:
+            if path:
+                stream.close()
@@ -0,0 +1,25 @@
+import os
+from django.core.management.base import BaseCommand, CommandError
+from apps.common.catalog import FORMATS, IMPORT_CHUNK_SIZE, import_catalog, read_rows
+
+
+class Command(BaseCommand):
+    help = "Upserts products on slug from a CSV or JSONL file in chunks"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=FORMATS,
+                            help="Defaults to the file extension")
+        parser.add_argument('--chunk-size', type=int, default=IMPORT_CHUNK_SIZE)
+
+    def handle(self, *args, path, format, chunk_size, **options):
+        fmt = format or os.path.splitext(path)[1].lstrip('.').lower()
+        if fmt not in FORMATS:
+            raise CommandError(f"Unknown format '{fmt}', pass --format")
+        with open(path, encoding='utf-8-sig', newline='') as stream:
+            result = import_catalog(read_rows(stream, fmt), chunk_size)
+        for line_number, message in result.errors:
+            self.stderr.write(f"line {line_number}: {message}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {result.created}, updated {result.updated}, skipped {result.skipped} products"
+        ))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from apps.common.models import Product
+from apps.common.search import index_products
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the product full-text search index in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, batch_size, **options):
+        ids = Product.objects.order_by('pk').values_list('pk', flat=True)
+        batch, total = [], 0
+        for pk in ids.iterator(chunk_size=batch_size):
+            batch.append(pk)
+            if len(batch) == batch_size:
+                index_products(batch)
+                total, batch = total + len(batch), []
+        if batch:
+            index_products(batch)
+            total += len(batch)
+        self.stdout.write(self.style.SUCCESS(f"Indexed {total} products"))
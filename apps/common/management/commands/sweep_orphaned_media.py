@@ -0,0 +1,23 @@
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from apps.common.media import find_orphans, iter_media_files
+
+
+class Command(BaseCommand):
+    help = "Deletes image files under MEDIA_ROOT that no row references any more"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--min-age', type=int, default=3600,
+                            help="Skip files modified in the last N seconds (uploads still in flight)")
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, batch_size, min_age, dry_run, **options):
+        total = 0
+        for name in find_orphans(iter_media_files(min_age), batch_size):
+            if not dry_run:
+                default_storage.delete(name)
+            self.stdout.write(name)
+            total += 1
+        verb = "Found" if dry_run else "Deleted"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {total} orphaned files"))
@@ -0,0 +1,118 @@
+import os
+import time
+import logging
+from redis import RedisError
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.core.files.storage import default_storage
+from .images import VARIANTS_DIR, variants_field_name
+from .redis_client import get_redis
+
+MEDIA_DELETE_QUEUE_KEY = 'media:delete_queue'
+# Image fields whose files (and WebP variants) are owned by their rows.
+MEDIA_FIELDS = {
+    'common.Category': ('image', 'icon'),
+    'common.Gallery': ('image',),
+    'common.Banner': ('image',),
+    'common.Brand': ('image',),
+}
+
+logger = logging.getLogger(__name__)
+
+
+def instance_files(instance):
+    names = []
+    for field_name in MEDIA_FIELDS.get(instance._meta.label, ()):
+        name = getattr(instance, field_name).name
+        if name:
+            names.append(name)
+            variants = getattr(instance, variants_field_name(field_name)) or {}
+            names.extend(variants.get('webp', {}).values())
+    return names
+
+
+def queue_instance_files(instance):
+    """Queues the files of a deleted row once (and only if) the delete commits."""
+    names = instance_files(instance)
+    if names:
+        transaction.on_commit(lambda: _push_deletes(names))
+
+
+def _push_deletes(names):
+    try:
+        get_redis().rpush(MEDIA_DELETE_QUEUE_KEY, *names)
+    except RedisError:
+        # The delete has already committed; sweep_orphaned_media picks the files up later.
+        logger.warning("Could not queue %d media files for deletion", len(names), exc_info=True)
+
+
+def delete_queued_files(batch_size=500):
+    client, deleted = get_redis(), 0
+    while True:
+        names = client.lpop(MEDIA_DELETE_QUEUE_KEY, batch_size)
+        if not names:
+            return deleted
+        for name in names:
+            default_storage.delete(name)
+        deleted += len(names)
+
+
+def _upload_dirs():
+    dirs = {VARIANTS_DIR}
+    for label, field_names in MEDIA_FIELDS.items():
+        model = apps.get_model(label)
+        dirs.update(model._meta.get_field(name).upload_to.strip('/') for name in field_names)
+    return sorted(dirs)
+
+
+def iter_media_files(min_age=0):
+    """Yields media-relative paths under the managed upload directories, lazily."""
+    root = os.fspath(settings.MEDIA_ROOT)
+    newest = time.time() - min_age
+    stack = [os.path.join(root, directory) for directory in _upload_dirs()]
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False) and entry.stat().st_mtime <= newest:
+                    yield os.path.relpath(entry.path, root).replace(os.sep, '/')
+
+
+def _referenced(names):
+    """Returns which of ``names`` (originals or variants) are still used by some row."""
+    originals = {name for name in names if not name.startswith(f'{VARIANTS_DIR}/')}
+    roots = {}
+    for name in names:
+        if name not in originals:
+            # variants/gallery/photo.jpg-640w.webp belongs to gallery/photo.jpg
+            roots.setdefault(name[len(VARIANTS_DIR) + 1:].rsplit('-', 1)[0], []).append(name)
+    referenced = set()
+    for label, field_names in MEDIA_FIELDS.items():
+        manager = apps.get_model(label)._default_manager
+        for field_name in field_names:
+            if originals:
+                referenced.update(manager.filter(**{f'{field_name}__in': originals})
+                                  .values_list(field_name, flat=True))
+            if roots:
+                for source in manager.filter(**{f'{field_name}__in': roots}).values_list(field_name, flat=True):
+                    referenced.update(roots[source])
+    return referenced
+
+
+def find_orphans(paths, batch_size=500):
+    batch = []
+    for path in paths:
+        batch.append(path)
+        if len(batch) == batch_size:
+            referenced = _referenced(batch)
+            yield from (name for name in batch if name not in referenced)
+            batch = []
+    if batch:
+        referenced = _referenced(batch)
+        yield from (name for name in batch if name not in referenced)
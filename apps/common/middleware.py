@@ -0,0 +1,23 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from . import presence
+
+
+class PresenceMiddleware:
+    """Records every visitor in the Redis presence sets instead of the database."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        presence.touch(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        await sync_to_async(presence.touch)(request)
+        return await self.get_response(request)
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:17
+
+from django.db import migrations, models
+
+
+def populate_paths(apps, schema_editor):
+    Category = apps.get_model('common', 'Category')
+    paths, pending = {None: ''}, list(Category.objects.values_list('id', 'parent_id'))
+    while pending:
+        remaining = []
+        for pk, parent_id in pending:
+            if parent_id in paths:
+                paths[pk] = f'{paths[parent_id]}{pk:010d}/'
+            else:
+                remaining.append((pk, parent_id))
+        if len(remaining) == len(pending):
+            break
+        pending = remaining
+    categories = list(Category.objects.filter(pk__in=paths))
+    for category in categories:
+        category.path = paths[category.pk]
+        category.depth = category.path.count('/') - 1
+    Category.objects.bulk_update(categories, ['path', 'depth'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='depth',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Depth'),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=255, verbose_name='Path'),
+        ),
+        migrations.RunPython(populate_paths, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0003_product_category_choices'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='quantity',
+            field=models.PositiveIntegerField(default=0, verbose_name='Quantity'),
+        ),
+    ]
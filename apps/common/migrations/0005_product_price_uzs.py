@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0004_product_quantity'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='product',
+            name='price_uzs',
+            field=models.DecimalField(decimal_places=2, max_digits=14, null=True, verbose_name='Price in UZS'),
+        ),
+    ]
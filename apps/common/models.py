@@ -1,10 +1,19 @@
-import os
+from decimal import Decimal
+from asgiref.sync import sync_to_async
 from django.db import models
+from django.db.models import F, OuterRef, Subquery, Value
 from django.dispatch import receiver
+from django.core.files.storage import default_storage
+from django.core.exceptions import ValidationError
+from django.db.models.functions import Concat, Substr
 from apps.common.slug import unique_slugify
+from apps.common.cache import acached_payload, bump_version_on_commit, cached_payload
+from apps.common.feeds import schedule_section_feeds
+from apps.common import facets, images, media, search
+from django.contrib.postgres.search import SearchVectorField
 from django.utils.translation import gettext_lazy as _
 from ckeditor_uploader.fields import RichTextUploadingField
-from django.db.models.signals import post_migrate, post_delete
+from django.db.models.signals import post_migrate, post_delete, post_save, pre_delete, m2m_changed
 
 
 class BaseModel(models.Model):
@@ -15,44 +24,145 @@ class BaseModel(models.Model):
         abstract = True
 
 
+class CategoryQuerySet(models.QuerySet):
+    def subtree(self, category, include_self=True):
+        queryset = self.filter(path__startswith=category.path).order_by('path')
+        return queryset if include_self else queryset.exclude(pk=category.pk)
+
+    def ancestors(self, category, include_self=False):
+        ids = category.ancestor_ids
+        if include_self:
+            ids.append(category.pk)
+        return self.filter(pk__in=ids).order_by('depth')
+
+
+class CategoryManager(models.Manager.from_queryset(CategoryQuerySet)):
+    def get_queryset(self):
+        # ``Category.__str__`` renders the parent title, so always join it.
+        return super().get_queryset().select_related('parent')
+
+    def menu_tree(self):
+        return cached_payload('category', 'menu', self._build_menu_tree)
+
+    async def amenu_tree(self):
+        return await acached_payload('category', 'menu', sync_to_async(self._build_menu_tree))
+
+    def _build_menu_tree(self):
+        nodes, tree = {}, []
+        rows = self.get_queryset().order_by('depth', 'order').values(
+            'id', 'parent_id', 'title', 'slug', 'image', 'icon', 'top', 'image_variants', 'icon_variants')
+        for row in rows:
+            parent_id = row.pop('parent_id')
+            for field in ('image', 'icon'):
+                variants = row.pop(f'{field}_variants')
+                row[f'{field}_srcset'] = images.build_srcset(row[field], variants)
+                row[field] = default_storage.url(row[field]) if row[field] else None
+            row['children'] = []
+            nodes[row['id']] = row
+            siblings = nodes[parent_id]['children'] if parent_id in nodes else tree
+            siblings.append(row)
+        return tree
+
+
 class Category(models.Model):
     title = models.CharField(max_length=255, verbose_name=_("Title"))
     image = models.ImageField(upload_to='category/', null=True, blank=True, verbose_name=_("Image"))
     icon = models.ImageField(upload_to='icon/', null=True, blank=True, max_length=55, verbose_name=_("Icon"))
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+    icon_variants = models.JSONField(default=dict, blank=True, editable=False)
     order = models.PositiveIntegerField(default=0, verbose_name=_("Order"))
     top = models.BooleanField(default=True, verbose_name=_("Top category"))
     slug = models.SlugField(unique=True, verbose_name=_("Slug"))
     parent = models.ForeignKey('self', null=True, blank=True, on_delete=models.CASCADE, related_name='children',
                                verbose_name=_("Parent"))
+    path = models.CharField(max_length=255, db_index=True, editable=False, default='', verbose_name=_("Path"))
+    depth = models.PositiveIntegerField(default=0, editable=False, verbose_name=_("Depth"))
+
+    objects = CategoryManager()
 
     class Meta:
         verbose_name = _("Category")
         verbose_name_plural = _("Categories")
         ordering = ('order',)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Product cards embed the title, so a rename has to rebuild their feeds.
+        instance._loaded_title = instance.__dict__.get('title')
+        return instance
+
+    @property
+    def ancestor_ids(self):
+        return [int(segment) for segment in self.path.split('/')[:-2]]
+
+    def clean(self):
+        if self.pk and self.parent_id and self.parent.path.startswith(self.path):
+            raise ValidationError({'parent': _("A category can't be moved under itself")})
+
     def save(self, *args, **kwargs):
         if not self.pk:
             unique_slugify(self, self.title)
         super(Category, self).save(*args, **kwargs)
+        self._update_path()
+
+    def _update_path(self):
+        prefix = self.parent.path if self.parent_id else ''
+        path = f'{prefix}{self.pk:010d}/'
+        if path == self.path:
+            return
+        old_path, old_depth = self.path, self.depth
+        self.path, self.depth = path, path.count('/') - 1
+        Category.objects.filter(pk=self.pk).update(path=self.path, depth=self.depth)
+        if old_path:
+            # Re-root the whole subtree in a single UPDATE.
+            Category.objects.filter(path__startswith=old_path).exclude(pk=self.pk).update(
+                path=Concat(Value(self.path), Substr('path', len(old_path) + 1)),
+                depth=F('depth') + self.depth - old_depth,
+            )
+            # The subtree's products leave the old ancestors' facet indexes and join the new ones.
+            old_ancestor_ids = [int(segment) for segment in old_path.split('/')[:-2]]
+            facets.invalidate_facet_ids(old_ancestor_ids + self.ancestor_ids)
 
     def __str__(self):
         return f"{self.parent.title} || {self.title}" if self.parent else self.title
 
 
+class ProductQuerySet(models.QuerySet):
+    def with_card_data(self):
+        first_gallery = Gallery.objects.filter(product=OuterRef('pk')).order_by('pk')
+        # The tsvector is only read inside the database, never by serializers.
+        return self.select_related('category').prefetch_related('characteristics').defer('search_vector').annotate(
+            first_image_path=Subquery(first_gallery.values('image')[:1]),
+            first_image_variants=Subquery(first_gallery.values('image_variants')[:1], output_field=models.JSONField()),
+        )
+
+    def with_detail_data(self):
+        return self.with_card_data().prefetch_related('galleries')
+
+    def search(self, query):
+        """Ranked full-text search over title, description and characteristic values."""
+        return search.get_backend().search(self, query)
+
+
 class Product(BaseModel):
     title = models.CharField(max_length=255, db_index=True, verbose_name=_("Title"))
     price = models.DecimalField(max_digits=10, decimal_places=2, verbose_name=_("Price"))
-    price_uzs = models.DecimalField(max_digits=10, decimal_places=2, null=True, verbose_name=_("Price in UZS"))
+    price_uzs = models.DecimalField(max_digits=14, decimal_places=2, null=True, verbose_name=_("Price in UZS"))
     discount = models.PositiveIntegerField(default=0, verbose_name=_("Discount"))
     description = models.TextField(null=True, blank=True, verbose_name=_("Description"))
     view_count = models.PositiveIntegerField(default=0, verbose_name=_("View Count"))
+    quantity = models.PositiveIntegerField(default=0, verbose_name=_("Quantity"))
+    search_vector = SearchVectorField(null=True, editable=False)
     video_url = models.URLField(default='image.jfif', null=True, blank=True, verbose_name=_("Video Url"))
     body = RichTextUploadingField(default=_("good"), verbose_name=_("Body"))
     on_sale = models.BooleanField(default=True, verbose_name=_("On Sale"))
     is_many = models.BooleanField(default=True, verbose_name=_("Can you sell more?"))
     slug = models.SlugField(unique=True, verbose_name=_("Slug"))
     category = models.ForeignKey(Category, on_delete=models.PROTECT, related_name="products",
-                                 limit_choices_to={'parent_isnull': False}, verbose_name=_("Category"))
+                                 limit_choices_to={'parent__isnull': False}, verbose_name=_("Category"))
+
+    objects = ProductQuerySet.as_manager()
 
     class Meta:
         verbose_name = _("Product")
@@ -64,7 +174,25 @@ class Product(BaseModel):
 
     @property
     def first_image(self):
-        return self.galleries.first().image if self.galleries.exists() else None
+        gallery = self.galleries.order_by('pk').first()
+        return gallery.image if gallery else None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Kept so moving a product can invalidate the category it left.
+        instance._loaded_category_id = instance.__dict__.get('category_id')
+        return instance
+
+    def save(self, *args, **kwargs):
+        from apps.payment.models import Settings
+
+        if not self.pk:
+            unique_slugify(self, self.title)
+        rate = Settings.get_solo().usd_to_uzs_rate
+        if rate:
+            self.price_uzs = Decimal(str(self.price)) * rate
+        super(Product, self).save(*args, **kwargs)
 
     def __str__(self):
         return self.title
@@ -73,6 +201,7 @@ class Product(BaseModel):
 class Gallery(BaseModel):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='galleries', verbose_name=_("Product"))
     image = models.ImageField(upload_to="gallery/", verbose_name=_("Image"))
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
 
     class Meta:
         verbose_name = _("Gallery")
@@ -97,6 +226,7 @@ class Banner(BaseModel):
 
     title = models.CharField(max_length=255, null=True, verbose_name=_("Title"))
     image = models.ImageField(upload_to="banner/", verbose_name=_("Image"))
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     url = models.URLField(null=True, blank=True, verbose_name=_("Banner URL"))
     order = models.PositiveIntegerField(default=0, verbose_name=_("Order"))
     description = models.TextField(null=True, blank=True, verbose_name=_("Description"))
@@ -114,6 +244,7 @@ class Banner(BaseModel):
 
 class Brand(BaseModel):
     image = models.ImageField(upload_to='brand/', verbose_name=_("Image"))
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     name = models.CharField(max_length=255, verbose_name=_("Brand Name"))
     url = models.URLField(verbose_name=_("Brand URL"), null=True, blank=True)
     order = models.PositiveIntegerField(default=0, verbose_name=_("Order number"))
@@ -133,10 +264,20 @@ class Section(BaseModel):
     products = models.ManyToManyField(Product, related_name='product_sections',
                                       limit_choices_to={'on_sale': True, 'quantity__gt': 0}, blank=True)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # A changed code leaves the feed cached under the old one behind.
+        instance._loaded_code = instance.__dict__.get('code')
+        return instance
+
     def save(self, *args, **kwargs):
-        count = self.__class__.objects.all().count()
-        self.code = f"section_{count + 1}"
         super(Section, self).save(*args, **kwargs)
+        if not self.code:
+            # Derived from the primary key so no count() over the table is needed,
+            # and suffixed if a hand-entered code already holds it.
+            unique_slugify(self, f"section_{self.pk}", slug_field_name='code', slug_separator='_')
+            Section.objects.filter(pk=self.pk).update(code=self.code)
 
     class Meta:
         verbose_name = _("Section")
@@ -176,19 +317,105 @@ def my_post_migrate_handler(sender, **kwargs):
             Section.objects.create(name=f'Section {1 + i}', code=f'section_{i + 1}')
 
 
+@receiver(post_delete, sender=Category)
 @receiver(post_delete, sender=Gallery)
-def post_delete_handler_gallery(sender, instance, **kwargs):
-    if os.path.exists(instance.image.path):
-        os.remove(instance.image.path)
+@receiver(post_delete, sender=Banner)
+@receiver(post_delete, sender=Brand)
+def post_delete_handler_media(sender, instance, **kwargs):
+    media.queue_instance_files(instance)
 
 
-@receiver(post_delete, sender=Banner)
-def post_delete_handler_banner(sender, instance, **kwargs):
-    if os.path.exists(instance.image.path):
-        os.remove(instance.image.path)
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=Banner)
+@receiver([post_save, post_delete], sender=Brand)
+@receiver([post_save, post_delete], sender=Section)
+@receiver([post_save, post_delete], sender=Product)
+@receiver([post_save, post_delete], sender=Gallery)
+@receiver([post_save, post_delete], sender=ProductCharacteristics)
+def invalidate_catalog_cache(sender, **kwargs):
+    bump_version_on_commit(sender._meta.model_name)
 
 
-@receiver(post_delete, sender=Brand)
-def post_delete_handler_brand(sender, instance, **kwargs):
-    if os.path.exists(instance.image.path):
-        os.remove(instance.image.path)
\ No newline at end of file
+@receiver(m2m_changed, sender=Section.products.through)
+def rebuild_feeds_on_section_products(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        schedule_section_feeds([instance.code])
+    else:
+        sections = Section.objects.all() if pk_set is None else Section.objects.filter(pk__in=pk_set)
+        schedule_section_feeds(sections.values_list('code', flat=True))
+
+
+@receiver([post_save, post_delete], sender=Section)
+def rebuild_feeds_on_section(sender, instance, **kwargs):
+    # Rebuilding a code that no longer has a section drops its cached feed.
+    schedule_section_feeds([instance.code, getattr(instance, '_loaded_code', None)])
+    instance._loaded_code = instance.code
+
+
+@receiver(post_save, sender=Category)
+def rebuild_feeds_on_category_title(sender, instance, created=False, **kwargs):
+    previous = getattr(instance, '_loaded_title', None)
+    instance._loaded_title = instance.title
+    if created or previous is None or previous == instance.title:
+        return
+    schedule_section_feeds(Section.objects.filter(products__category=instance).values_list('code', flat=True))
+
+
+@receiver([post_save, pre_delete], sender=Product)
+def rebuild_feeds_on_product(sender, instance, created=False, **kwargs):
+    if created:
+        return
+    schedule_section_feeds(instance.product_sections.values_list('code', flat=True))
+
+
+@receiver([post_save, post_delete], sender=Gallery)
+def rebuild_feeds_on_gallery(sender, instance, **kwargs):
+    schedule_section_feeds(Section.objects.filter(products=instance.product_id).values_list('code', flat=True))
+
+
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, **kwargs):
+    search.schedule_index(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=ProductCharacteristics)
+def index_product_characteristics(sender, instance, **kwargs):
+    search.schedule_index(instance.product_id)
+
+
+@receiver(post_delete, sender=Product)
+def unindex_product(sender, instance, **kwargs):
+    search.remove_products([instance.pk])
+
+
+@receiver([post_save, post_delete], sender=Product)
+def invalidate_product_facets(sender, instance, **kwargs):
+    facets.invalidate_facets(instance.category)
+    previous_id = getattr(instance, '_loaded_category_id', None)
+    if previous_id and previous_id != instance.category_id:
+        previous = Category.objects.filter(pk=previous_id).first()
+        if previous:
+            facets.invalidate_facets(previous)
+    instance._loaded_category_id = instance.category_id
+
+
+@receiver([post_save, post_delete], sender=ProductCharacteristics)
+def invalidate_characteristic_facets(sender, instance, **kwargs):
+    category = Category.objects.filter(products=instance.product_id).first()
+    if category:
+        facets.invalidate_facets(category)
+
+
+@receiver(post_save, sender=Category)
+def generate_category_image_variants(sender, instance, **kwargs):
+    images.schedule_variants(instance, 'image')
+    images.schedule_variants(instance, 'icon')
+
+
+@receiver(post_save, sender=Gallery)
+@receiver(post_save, sender=Banner)
+@receiver(post_save, sender=Brand)
+def generate_image_variants(sender, instance, **kwargs):
+    images.schedule_variants(instance, 'image')
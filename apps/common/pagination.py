@@ -0,0 +1,147 @@
+import json
+import base64
+from functools import reduce
+from django.db.models import Q
+from django.core.exceptions import ValidationError
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Seeks to the page after an opaque cursor that holds the ordering values
+    of the last row seen, so deep pages cost the same as the first one. The
+    ordering must end in a unique field. Views may override it with
+    ``keyset_ordering``. ``COUNT(*)`` only runs when ``?count=true`` is sent.
+    """
+    ordering = ('-created_at', '-id')
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'limit'
+    count_query_param = 'count'
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = 100
+
+    def get_ordering(self, view):
+        return getattr(view, 'keyset_ordering', None) or self.ordering
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.GET[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def encode_cursor(self, values, reverse):
+        payload = json.dumps({'v': values, 'r': int(reverse)}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, request):
+        raw = request.GET.get(self.cursor_query_param)
+        if not raw:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(raw + '=' * (-len(raw) % 4)))
+            values = [field.to_python(value) for field, value in zip(self.fields, payload['v'], strict=True)]
+            return values, bool(payload['r'])
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound('Invalid cursor')
+
+    def _seek(self, values, reverse):
+        # (a, b) after (x, y) in the page direction is a > x OR (a = x AND b > y),
+        # with each comparison flipped for descending fields.
+        conditions = []
+        for i, (name, descending) in enumerate(self.ordering_fields):
+            lookup = 'gt' if descending == reverse else 'lt'
+            equal = {self.ordering_fields[j][0]: values[j] for j in range(i)}
+            conditions.append(Q(**equal, **{f'{name}__{lookup}': values[i]}))
+        return reduce(lambda left, right: left | right, conditions)
+
+    def get_page_queryset(self, queryset, request, view=None):
+        """Returns the slice of ``queryset`` to fetch for this page."""
+        self.request = request
+        ordering = self.get_ordering(view)
+        self.ordering_fields = [(field.lstrip('-'), field.startswith('-')) for field in ordering]
+        self.fields = [queryset.model._meta.get_field(name) for name, _ in self.ordering_fields]
+        self.page_size = self.get_page_size(request)
+        self.count = None
+
+        self.cursor, self.reverse = self.decode_cursor(request)
+        if self.reverse:
+            # Walk backwards with the ordering flipped, then restore the order.
+            queryset = queryset.order_by(*[name if descending else f'-{name}'
+                                           for name, descending in self.ordering_fields])
+        else:
+            queryset = queryset.order_by(*ordering)
+        if self.cursor is not None:
+            queryset = queryset.filter(self._seek(self.cursor, self.reverse))
+        return queryset[:self.page_size + 1]
+
+    def count_requested(self, request):
+        return request.GET.get(self.count_query_param) == 'true'
+
+    def finish_page(self, rows):
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if self.reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.cursor is not None
+        self.first, self.last = (rows[0], rows[-1]) if rows else (None, None)
+        return rows
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page = self.get_page_queryset(queryset, request, view)
+        if self.count_requested(request):
+            self.count = queryset.count()
+        return self.finish_page(list(page))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Async counterpart of ``paginate_queryset`` for plain Django views."""
+        page = self.get_page_queryset(queryset, request, view)
+        if self.count_requested(request):
+            self.count = await queryset.acount()
+        return self.finish_page([row async for row in page])
+
+    def _row_values(self, row):
+        return [field.value_to_string(row) for field in self.fields]
+
+    def get_next_link(self):
+        if not self.has_next or self.last is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param,
+                                   self.encode_cursor(self._row_values(self.last), reverse=False))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.first is None:
+            return remove_query_param(url, self.cursor_query_param)
+        return replace_query_param(url, self.cursor_query_param,
+                                   self.encode_cursor(self._row_values(self.first), reverse=True))
+
+    def get_paginated_payload(self, data):
+        payload = {'next': self.get_next_link(), 'previous': self.get_previous_link(), 'results': data}
+        if self.count is not None:
+            payload = {'count': self.count, **payload}
+        return payload
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_payload(data))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'count': {'type': 'integer', 'example': 123},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
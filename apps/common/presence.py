@@ -0,0 +1,89 @@
+import time
+import uuid
+import ipaddress
+from redis import RedisError
+from rest_framework.exceptions import AuthenticationFailed
+from .redis_client import get_redis
+
+VISITORS_KEY = 'presence:visitors'
+AUTHENTICATED_KEY = 'presence:authenticated'
+# Presence older than this can't be asked about and is trimmed by the snapshot job.
+PRESENCE_RETENTION = 60 * 60 * 24
+# Used while ``Settings.minute`` is left at 0.
+DEFAULT_ONLINE_MINUTES = 5
+# Client-chosen ids can't grow the sets past this; the oldest members go first.
+MAX_TRACKED_VISITORS = 100000
+
+
+def _user_id(request):
+    """The session user, or the user of a valid bearer token for API clients."""
+    from apps.users.authentication import CachedJWTAuthentication
+
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user.pk
+    if not request.META.get('HTTP_AUTHORIZATION'):
+        return None
+    try:
+        result = CachedJWTAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return None
+    return result[0].pk if result else None
+
+
+def _uuid(value):
+    try:
+        return str(uuid.UUID(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _ip(value):
+    try:
+        return str(ipaddress.ip_address((value or '').strip()))
+    except ValueError:
+        return None
+
+
+def visitor_id(request, user_id=None):
+    if user_id is not None:
+        return f'user:{user_id}'
+    visitor_uuid = _uuid(request.headers.get('X-Visitor-Uuid')) or _uuid(request.COOKIES.get('visitor_uuid'))
+    if visitor_uuid:
+        return f'uuid:{visitor_uuid}'
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '')
+    return f"ip:{_ip(forwarded.split(',')[0]) or request.META.get('REMOTE_ADDR')}"
+
+
+def touch(request):
+    now = time.time()
+    try:
+        user_id = _user_id(request)
+        member = visitor_id(request, user_id)
+        pipe = get_redis().pipeline(transaction=False)
+        keys = (VISITORS_KEY, AUTHENTICATED_KEY) if user_id is not None else (VISITORS_KEY,)
+        for key in keys:
+            pipe.zadd(key, {member: now})
+            pipe.zremrangebyrank(key, 0, -MAX_TRACKED_VISITORS - 1)
+        pipe.execute()
+    except RedisError:
+        # Presence is best effort and must never fail the request.
+        pass
+
+
+def online_counts(minutes):
+    """Counts visitors seen in the last ``minutes`` minutes with two ZCOUNTs."""
+    since = time.time() - minutes * 60
+    pipe = get_redis().pipeline(transaction=False)
+    pipe.zcount(VISITORS_KEY, since, '+inf')
+    pipe.zcount(AUTHENTICATED_KEY, since, '+inf')
+    total, authenticated = pipe.execute()
+    return {'total': total, 'authenticated': authenticated, 'anonymous': total - authenticated}
+
+
+def trim():
+    expired = time.time() - PRESENCE_RETENTION
+    pipe = get_redis().pipeline(transaction=False)
+    pipe.zremrangebyscore(VISITORS_KEY, '-inf', expired)
+    pipe.zremrangebyscore(AUTHENTICATED_KEY, '-inf', expired)
+    pipe.execute()
@@ -0,0 +1,12 @@
+from functools import lru_cache
+from redis import Redis
+from django.conf import settings
+
+
+@lru_cache(maxsize=None)
+def get_redis() -> Redis:
+    """
+    Returns a client for the raw Redis data structures (hashes, sorted sets,
+    counters) that the Django cache API doesn't expose.
+    """
+    return Redis.from_url(settings.REDIS_URL, decode_responses=True)
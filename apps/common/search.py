@@ -0,0 +1,134 @@
+import re
+from functools import lru_cache
+from transliterate import translit
+from django.db.models import Case, F, Value, When
+from django.db import connection, transaction
+from django.db.models.expressions import RawSQL
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+
+FTS_TABLE = 'common_product_fts'
+SEARCH_CONFIG = 'simple'
+INDEX_BATCH_SIZE = 500
+TOKEN_RE = re.compile(r'\w+')
+
+
+@lru_cache(maxsize=4096)
+def _latinize(text):
+    return translit(text, 'ru', reversed=True)
+
+
+def _with_latin(text):
+    # Index the Latin spelling next to the original so "telefon" finds
+    # "Телефон" and the other way round.
+    latin = _latinize(text)
+    return text if latin == text else f'{text} {latin}'
+
+
+def _query_variants(query):
+    variants = []
+    for text in (query, _latinize(query)):
+        tokens = tuple(TOKEN_RE.findall(text.lower()))
+        if tokens and tokens not in variants:
+            variants.append(tokens)
+    return variants
+
+
+class PostgresSearchBackend:
+    """Weighted ``tsvector`` column on ``Product`` served by a GIN index."""
+
+    def search(self, queryset, query):
+        variants = _query_variants(query)
+        if not variants:
+            return queryset.none()
+        raw = ' | '.join('(' + ' & '.join(f'{token}:*' for token in tokens) + ')' for tokens in variants)
+        search_query = SearchQuery(raw, search_type='raw', config=SEARCH_CONFIG)
+        return queryset.filter(search_vector=search_query).annotate(
+            rank=SearchRank(F('search_vector'), search_query)
+        ).order_by('-rank', '-id')
+
+    def index(self, documents):
+        from .models import Product
+
+        # One UPDATE ... SET search_vector = CASE id ... WHERE id IN (...) per batch.
+        for i in range(0, len(documents), INDEX_BATCH_SIZE):
+            batch = documents[i:i + INDEX_BATCH_SIZE]
+            Product.objects.filter(pk__in=[pk for pk, _, _ in batch]).update(search_vector=Case(*[
+                When(pk=pk, then=SearchVector(Value(title), weight='A', config=SEARCH_CONFIG)
+                     + SearchVector(Value(body), weight='B', config=SEARCH_CONFIG))
+                for pk, title, body in batch
+            ]))
+
+    def remove(self, ids):
+        pass
+
+
+class SQLiteSearchBackend:
+    """FTS5 table keyed by product id, for local development on SQLite."""
+
+    def search(self, queryset, query):
+        variants = _query_variants(query)
+        if not variants:
+            return queryset.none()
+        match = ' OR '.join('(' + ' AND '.join(f'"{token}"*' for token in tokens) + ')' for tokens in variants)
+        matched = RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', (match,))
+        rank = RawSQL(
+            f'SELECT bm25({FTS_TABLE}, 10.0, 1.0) FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s AND {FTS_TABLE}.rowid = common_product.id', (match,)
+        )
+        return queryset.filter(pk__in=matched).annotate(rank=rank).order_by('rank', '-id')
+
+    def index(self, documents):
+        with connection.cursor() as cursor:
+            cursor.executemany(f'INSERT OR REPLACE INTO {FTS_TABLE} (rowid, title, body) VALUES (%s, %s, %s)',
+                               documents)
+
+    def remove(self, ids):
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [(pk,) for pk in ids])
+
+
+class IContainsSearchBackend:
+    """Unranked fallback for databases without a full-text engine."""
+
+    def search(self, queryset, query):
+        return queryset.filter(title__icontains=query.strip()).order_by('-id')
+
+    def index(self, documents):
+        pass
+
+    def remove(self, ids):
+        pass
+
+
+def get_backend():
+    if connection.vendor == 'postgresql':
+        return PostgresSearchBackend()
+    if connection.vendor == 'sqlite':
+        return SQLiteSearchBackend()
+    return IContainsSearchBackend()
+
+
+def build_documents(product_ids):
+    from .models import Product, ProductCharacteristics
+
+    values = {}
+    for product_id, value in ProductCharacteristics.objects.filter(
+            product_id__in=product_ids).values_list('product_id', 'value'):
+        values.setdefault(product_id, []).append(value)
+    return [
+        (pk, _with_latin(title), _with_latin(' '.join([description or '', *values.get(pk, [])])))
+        for pk, title, description in Product.objects.filter(pk__in=product_ids).values_list(
+            'pk', 'title', 'description')
+    ]
+
+
+def index_products(product_ids):
+    get_backend().index(build_documents(product_ids))
+
+
+def schedule_index(product_id):
+    transaction.on_commit(lambda: index_products([product_id]))
+
+
+def remove_products(product_ids):
+    get_backend().remove(product_ids)
@@ -1,8 +1,93 @@
+from django.core.files.storage import default_storage
 from rest_framework import serializers
 from . import models
+from .images import build_srcset, variants_field_name
+
+
+class SrcsetField(serializers.Field):
+    """``srcset`` of an image's WebP variants, ``None`` until they are rendered."""
+
+    def __init__(self, image_field='image', **kwargs):
+        self.image_field = image_field
+        kwargs.update(source='*', read_only=True)
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        name = getattr(instance, self.image_field).name
+        variants = getattr(instance, variants_field_name(self.image_field))
+        return build_srcset(name, variants, self.context.get('request'))
 
 
 class BannerListSerializers(serializers.ModelSerializer):
+    image_srcset = SrcsetField()
+
     class Meta:
         model = models.Banner
-        fields = ('id', 'title', 'image', 'url', 'description')
\ No newline at end of file
+        fields = ('id', 'title', 'image', 'image_srcset', 'url', 'description')
+
+
+class BrandListSerializers(serializers.ModelSerializer):
+    image_srcset = SrcsetField()
+
+    class Meta:
+        model = models.Brand
+        fields = ('id', 'name', 'image', 'image_srcset', 'url')
+
+
+class SectionListSerializers(serializers.ModelSerializer):
+    class Meta:
+        model = models.Section
+        fields = ('id', 'name', 'code')
+
+
+class GallerySerializers(serializers.ModelSerializer):
+    image_srcset = SrcsetField()
+
+    class Meta:
+        model = models.Gallery
+        fields = ('id', 'image', 'image_srcset')
+
+
+class ProductCharacteristicsSerializers(serializers.ModelSerializer):
+    class Meta:
+        model = models.ProductCharacteristics
+        fields = ('id', 'title', 'value')
+
+
+class ProductListSerializers(serializers.ModelSerializer):
+    first_image = serializers.SerializerMethodField()
+    first_image_srcset = serializers.SerializerMethodField()
+    characteristics = ProductCharacteristicsSerializers(many=True, read_only=True)
+
+    class Meta:
+        model = models.Product
+        fields = ('id', 'title', 'slug', 'price', 'price_uzs', 'discount', 'on_sale', 'category', 'category_name',
+                  'first_image', 'first_image_srcset', 'characteristics')
+        read_only_fields = fields
+
+    def get_first_image(self, obj):
+        # ``first_image_path`` is annotated by ``Product.objects.with_card_data()``.
+        if not obj.first_image_path:
+            return None
+        url = default_storage.url(obj.first_image_path)
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+    def get_first_image_srcset(self, obj):
+        return build_srcset(obj.first_image_path, obj.first_image_variants, self.context.get('request'))
+
+
+class ProductDetailSerializers(ProductListSerializers):
+    galleries = GallerySerializers(many=True, read_only=True)
+
+    class Meta(ProductListSerializers.Meta):
+        fields = ProductListSerializers.Meta.fields + ('description', 'body', 'video_url', 'view_count', 'is_many',
+                                                       'galleries')
+        read_only_fields = fields
+
+
+class SectionProductSerializers(ProductListSerializers):
+    class Meta(ProductListSerializers.Meta):
+        fields = ('id', 'title', 'slug', 'price', 'price_uzs', 'discount', 'category_name', 'first_image',
+                  'first_image_srcset')
+        read_only_fields = fields
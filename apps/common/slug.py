@@ -1,8 +1,15 @@
 import re
+from functools import lru_cache
+from django.db.models import Q
 from django.utils.text import slugify
 from transliterate import translit
 
 
+# Room kept for a numeric suffix when a slug has to be truncated.
+SUFFIX_RESERVE = 10
+BULK_PREFIX_BATCH = 500
+
+
 def unique_slugify(instance, value, slug_field_name='slug', queryset=None,
                    slug_separator='-'):
     """
@@ -11,19 +18,12 @@ def unique_slugify(instance, value, slug_field_name='slug', queryset=None,
     store the slug in (and the field to check against for uniqueness).
     ``queryset`` usually doesn't need to be explicitly provided - it'll default
     to using the ``.all()`` queryset from the model's default manager.
+    Every existing slug sharing the prefix is fetched in a single query and
+    the next free suffix is picked in memory.
     """
     slug_field = instance._meta.get_field(slug_field_name)
-    transliterated_text = translit(value, 'ru', reversed=True)
-
-    slug = getattr(instance, slug_field.attname)
     slug_len = slug_field.max_length
-
-    # Sort out the initial slug, limiting its length if necessary.
-    slug = slugify(transliterated_text)
-    if slug_len:
-        slug = slug[:slug_len]
-    slug = _slug_strip(slug, slug_separator)
-    original_slug = slug
+    original_slug = _base_slug(value, slug_len, slug_separator)
 
     # Create the queryset if one wasn't explicitly provided and exclude the
     # current instance from the queryset.
@@ -32,10 +32,82 @@ def unique_slugify(instance, value, slug_field_name='slug', queryset=None,
     if instance.pk:
         queryset = queryset.exclude(pk=instance.pk)
 
+    prefix = _lookup_prefix(original_slug, slug_len, slug_separator)
+    taken = set(queryset.filter(**{f'{slug_field_name}__startswith': prefix})
+                .values_list(slug_field_name, flat=True))
+
+    def is_taken(slug):
+        if slug.startswith(prefix):
+            return slug in taken
+        return queryset.filter(**{slug_field_name: slug}).exists()
+
+    slug = _next_free_slug(original_slug, is_taken, slug_len, slug_separator)
+    setattr(instance, slug_field.attname, slug)
+
+
+def bulk_unique_slugify(instances, value_field_name='title', slug_field_name='slug',
+                        queryset=None, slug_separator='-'):
+    """
+    Assigns unique slugs to many unsaved instances of the same model at once,
+    e.g. before a ``bulk_create``. Existing slugs are fetched with one query
+    per ``BULK_PREFIX_BATCH`` distinct prefixes and slugs are also kept unique
+    within the batch itself.
+    """
+    instances = list(instances)
+    if not instances:
+        return instances
+    model = instances[0].__class__
+    slug_field = model._meta.get_field(slug_field_name)
+    slug_len = slug_field.max_length
+    if queryset is None:
+        queryset = model._default_manager.all()
+
+    originals = [_base_slug(getattr(instance, value_field_name), slug_len, slug_separator)
+                 for instance in instances]
+    prefixes = sorted({_lookup_prefix(slug, slug_len, slug_separator) for slug in originals})
+    taken = set()
+    for i in range(0, len(prefixes), BULK_PREFIX_BATCH):
+        condition = Q()
+        for prefix in prefixes[i:i + BULK_PREFIX_BATCH]:
+            condition |= Q(**{f'{slug_field_name}__startswith': prefix})
+        taken.update(queryset.filter(condition).values_list(slug_field_name, flat=True))
+
+    for instance, original_slug in zip(instances, originals):
+        slug = _next_free_slug(original_slug, taken.__contains__, slug_len, slug_separator)
+        taken.add(slug)
+        setattr(instance, slug_field.attname, slug)
+    return instances
+
+
+@lru_cache(maxsize=4096)
+def _transliterate(value):
+    return translit(value, 'ru', reversed=True)
+
+
+def _base_slug(value, slug_len, slug_separator):
+    # Sort out the initial slug, limiting its length if necessary.
+    slug = slugify(_transliterate(value))
+    if slug_len:
+        slug = slug[:slug_len]
+    return _slug_strip(slug, slug_separator)
+
+
+def _lookup_prefix(slug, slug_len, slug_separator):
+    if not slug:
+        return slug_separator
+    # Truncated candidates ("long-sl-2") no longer start with the full slug,
+    # so look up by a shorter prefix when truncation may happen.
+    if slug_len and len(slug) > slug_len - SUFFIX_RESERVE:
+        return slug[:max(slug_len - SUFFIX_RESERVE, 1)]
+    return slug
+
+
+def _next_free_slug(original_slug, is_taken, slug_len, slug_separator):
     # Find a unique slug. If one matches, at '-2' to the end and try again
     # (then '-3', etc).
+    slug = original_slug
     next = 2
-    while not slug or queryset.filter(**{slug_field_name: slug}):
+    while not slug or is_taken(slug):
         slug = original_slug
         end = f'{slug_separator}{next}'
         if slug_len and len(slug) + len(end) > slug_len:
@@ -43,8 +115,7 @@ def unique_slugify(instance, value, slug_field_name='slug', queryset=None,
             slug = _slug_strip(slug, slug_separator)
         slug = f'{slug}{end}'
         next += 1
-
-    setattr(instance, slug_field.attname, slug)
+    return slug
 
 
 def _slug_strip(value, separator='-'):
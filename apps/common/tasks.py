@@ -0,0 +1,57 @@
+from celery import shared_task
+from django.apps import apps
+from . import presence
+from .models import Gallery, OnlineUser, Section
+from apps.payment.models import Settings
+from .counters import flush_product_views
+from .feeds import build_section_feed, schedule_section_feeds
+from .cache import bump_version
+from .images import generate_variants
+from .media import delete_queued_files
+from .catalog import import_catalog_file
+
+
+@shared_task
+def flush_product_view_counts():
+    return flush_product_views()
+
+
+@shared_task
+def snapshot_online_users():
+    minute = Settings.get_solo().minute or presence.DEFAULT_ONLINE_MINUTES
+    counts = presence.online_counts(minute)
+    OnlineUser.objects.bulk_create([
+        OnlineUser(is_authenticated=True, quantity=counts['authenticated']),
+        OnlineUser(is_authenticated=False, quantity=counts['anonymous']),
+    ])
+    presence.trim()
+    return counts
+
+
+@shared_task
+def rebuild_section_feeds(codes):
+    for code in codes:
+        build_section_feed(code)
+    return codes
+
+
+@shared_task
+def generate_image_variants(model_label, pk, field_name):
+    model = apps.get_model(model_label)
+    variants = generate_variants(model, pk, field_name)
+    if variants:
+        # Variants are stored with update(), so refresh the cached payloads here.
+        bump_version(model._meta.model_name)
+        if model is Gallery:
+            schedule_section_feeds(Section.objects.filter(products__galleries=pk).values_list('code', flat=True))
+    return variants
+
+
+@shared_task
+def delete_queued_media_files():
+    return delete_queued_files()
+
+
+@shared_task
+def import_catalog_upload(name, fmt, job_id):
+    return import_catalog_file(name, fmt, job_id)
@@ -1,3 +1,653 @@
-from django.test import TestCase
+import io
+import json
+import time
+import tempfile
+from PIL import Image
+from unittest import mock
+from fakeredis import FakeRedis
+import os
+from redis import RedisError
+from django.db import DatabaseError
+from django.urls import reverse
+from django.core.management import call_command
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from apps.users.models import User
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework.test import APIClient
+from . import counters, images, media, models, presence
+from .catalog import (CatalogImport, export_rows, get_import_result, import_catalog, import_catalog_file, read_rows,
+                      render_rows)
+from .cache import LocalCopy, bump_version
+from .slug import bulk_unique_slugify, unique_slugify
 
-# Create your tests here.
+
+class LocalCopyTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_rebuilt_only_when_the_version_moves(self):
+        builder = mock.Mock(side_effect=[1, 2])
+        copy = LocalCopy('local_copy_test', builder, ttl=0)
+        self.assertEqual((copy.get(), copy.get()), (1, 1))
+        bump_version('local_copy_test')
+        self.assertEqual(copy.get(), 2)
+        self.assertEqual(builder.call_count, 2)
+
+    def test_ttl_skips_the_version_check(self):
+        copy = LocalCopy('local_copy_test', object, ttl=60)
+        value = copy.get()
+        with mock.patch('apps.common.cache.get_version') as get_version:
+            self.assertIs(copy.get(), value)
+        get_version.assert_not_called()
+        copy.clear()
+        self.assertIsNot(copy.get(), value)
+
+
+class SlugTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for title in ('Phones', 'Phones', 'Phones', 'Phones case'):
+            models.Category.objects.create(title=title)
+
+    def test_next_suffix_is_found_in_one_query(self):
+        self.assertEqual(sorted(models.Category.objects.values_list('slug', flat=True)),
+                         ['phones', 'phones-2', 'phones-3', 'phones-case'])
+        category = models.Category(title='Phones')
+        with self.assertNumQueries(1):
+            unique_slugify(category, category.title)
+        self.assertEqual(category.slug, 'phones-4')
+
+    def test_bulk_slugs_are_unique_within_the_batch(self):
+        categories = [models.Category(title=title) for title in ('Phones', 'Phones', 'Телефон', 'Телефон', 'Tablets')]
+        with self.assertNumQueries(1):
+            bulk_unique_slugify(categories)
+        self.assertEqual([category.slug for category in categories],
+                         ['phones-4', 'phones-5', 'telefon', 'telefon-2', 'tablets'])
+
+
+class CategoryTreeTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.phones = models.Category.objects.create(title='Phones')
+        cls.smartphones = models.Category.objects.create(title='Smartphones', parent=cls.phones)
+        cls.android = models.Category.objects.create(title='Android', parent=cls.smartphones)
+        cls.samsung = models.Category.objects.create(title='Samsung', parent=cls.android)
+        cls.gadgets = models.Category.objects.create(title='Gadgets', order=1)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_moving_a_category_re_roots_its_subtree(self):
+        self.smartphones.parent = self.gadgets
+        self.smartphones.save()
+        subtree = list(models.Category.objects.subtree(self.smartphones))
+        self.assertEqual(subtree, [self.smartphones, self.android, self.samsung])
+        self.assertEqual([category.depth for category in subtree], [1, 2, 3])
+        for category in subtree:
+            self.assertTrue(category.path.startswith(self.gadgets.path))
+        self.assertEqual(subtree[-1].ancestor_ids, [self.gadgets.pk, self.smartphones.pk, self.android.pk])
+        self.assertEqual(list(models.Category.objects.subtree(self.phones, include_self=False)), [])
+
+    def test_ancestors_take_one_query(self):
+        samsung = models.Category.objects.get(pk=self.samsung.pk)
+        with self.assertNumQueries(1):
+            ancestors = list(models.Category.objects.ancestors(samsung))
+        self.assertEqual(ancestors, [self.phones, self.smartphones, self.android])
+
+    def test_category_cannot_move_under_itself(self):
+        self.phones.parent = self.android
+        with self.assertRaises(ValidationError):
+            self.phones.clean()
+
+    def test_menu_is_cached_until_a_category_changes(self):
+        menu = models.Category.objects.menu_tree()
+        self.assertEqual([node['title'] for node in menu], ['Phones', 'Gadgets'])
+        with self.assertNumQueries(0):
+            models.Category.objects.menu_tree()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.gadgets.title = 'Accessories'
+            self.gadgets.save()
+        self.assertEqual([node['title'] for node in models.Category.objects.menu_tree()], ['Phones', 'Accessories'])
+
+
+class ProductListAPIViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        parent = models.Category.objects.create(title='Phones')
+        category = models.Category.objects.create(title='Smartphones', parent=parent)
+        for i in range(50):
+            product = models.Product.objects.create(title=f'Samsung Galaxy {i}', price=100 + i, category=category)
+            models.Gallery.objects.create(product=product, image=f'gallery/{i}-1.jpg')
+            models.Gallery.objects.create(product=product, image=f'gallery/{i}-2.jpg')
+            models.ProductCharacteristics.objects.create(product=product, title='RAM', value='8GB')
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_product_grid_query_count_is_constant(self):
+        # savepoint pair from ATOMIC_REQUESTS, products with category and
+        # first image, characteristics; the ETag comes from version keys
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('product-list'), {'limit': 50})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 50)
+        card = response.data['results'][0]
+        self.assertTrue(card['first_image'].endswith('-1.jpg'))
+        self.assertEqual(card['category_name'], 'Smartphones')
+        self.assertEqual(card['characteristics'][0]['value'], '8GB')
+        self.assertIn('search_vector', models.Product.objects.with_card_data().first().get_deferred_fields())
+
+    def test_keyset_pages_cover_every_product_once(self):
+        seen, url = [], reverse('product-list')
+        while url:
+            response = self.client.get(url, {'limit': 15} if not seen else {})
+            seen += [card['id'] for card in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(seen, list(models.Product.objects.order_by('-created_at', '-id').values_list('id', flat=True)))
+        self.assertNotIn('count', response.data)
+
+        previous = self.client.get(response.data['previous']).data
+        self.assertEqual([card['id'] for card in previous['results']], seen[30:45])
+        self.assertEqual(self.client.get(reverse('product-list'), {'count': 'true'}).data['count'], 50)
+        self.assertEqual(self.client.get(reverse('product-list'), {'cursor': 'bogus'}).status_code, 404)
+
+    def test_product_detail_query_count_is_constant(self):
+        product = models.Product.objects.first()
+        with self.assertNumQueries(6):
+            response = self.client.get(reverse('product-detail', args=[product.slug]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['galleries']), 2)
+
+
+class SectionFeedAPIViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = models.Category.objects.create(title='Phones')
+        cls.product = models.Product.objects.create(title='Galaxy', price=100, quantity=3, category=category)
+        cls.section = models.Section.objects.create(name='Hits')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_code_is_derived_without_counting(self):
+        self.assertEqual(self.section.code, f'section_{self.section.pk}')
+
+    def test_feed_is_rebuilt_when_section_products_change(self):
+        url = reverse('section-feed', args=[self.section.code])
+        self.assertEqual(self.client.get(url).data['products'], [])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.section.products.add(self.product)
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual([card['slug'] for card in response.data['products']], ['galaxy'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.title = 'Galaxy S24'
+            self.product.save()
+        self.assertEqual(self.client.get(url).data['products'][0]['title'], 'Galaxy S24')
+
+    def test_unrelated_product_saves_keep_the_feed_cached(self):
+        url = reverse('section-feed', args=[self.section.code])
+        self.client.get(url)
+        other = models.Product.objects.create(title='iPhone', price=900, category=self.product.category)
+        with self.captureOnCommitCallbacks(execute=True):
+            other.title = 'iPhone 15'
+            other.save()
+        # Only the ATOMIC_REQUESTS savepoint pair; the feed is still cached.
+        with self.assertNumQueries(2):
+            self.client.get(url)
+
+    def test_feed_is_rebuilt_on_section_and_category_renames(self):
+        url = reverse('section-feed', args=[self.section.code])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.section.products.add(self.product)
+        self.assertEqual(self.client.get(url).data['name'], 'Hits')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.section.name = 'Best sellers'
+            self.section.save()
+        self.assertEqual(self.client.get(url).data['name'], 'Best sellers')
+        category = models.Category.objects.get(pk=self.product.category_id)
+        with self.captureOnCommitCallbacks(execute=True):
+            category.title = 'Smartphones'
+            category.save()
+        self.assertEqual(self.client.get(url).data['products'][0]['category_name'], 'Smartphones')
+
+    def test_derived_code_skips_a_hand_entered_one(self):
+        next_pk = models.Section.objects.order_by('-pk').first().pk + 1
+        models.Section.objects.create(name='Manual', code=f'section_{next_pk + 1}')
+        section = models.Section.objects.create(name='Derived')
+        self.assertEqual(section.pk, next_pk + 1)
+        self.assertEqual(section.code, f'section_{section.pk}_2')
+
+
+class ProductSearchAPIViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = models.Category.objects.create(title='Phones')
+        with cls.captureOnCommitCallbacks(execute=True):
+            phone = models.Product.objects.create(title='Телефон Samsung Galaxy', price=100, category=category)
+            models.ProductCharacteristics.objects.create(product=phone, title='Color', value='Black')
+            models.Product.objects.create(title='Samsung charger', price=5, category=category,
+                                          description='Fits every Galaxy phone')
+            models.Product.objects.create(title='iPhone', price=900, category=category)
+
+    def search(self, query):
+        response = self.client.get(reverse('product-search'), {'q': query})
+        return [product['title'] for product in response.data['results']]
+
+    def test_title_matches_rank_first(self):
+        self.assertEqual(self.search('galaxy'), ['Телефон Samsung Galaxy', 'Samsung charger'])
+
+    def test_prefix_and_characteristic_matches(self):
+        self.assertEqual(self.search('sams bla'), ['Телефон Samsung Galaxy'])
+
+    def test_transliterated_queries(self):
+        self.assertEqual(self.search('telefon'), ['Телефон Samsung Galaxy'])
+        self.assertEqual(self.search('самсунг'), ['Телефон Samsung Galaxy', 'Samsung charger'])
+        self.assertEqual(self.search('Телеф'), ['Телефон Samsung Galaxy'])
+
+
+class ProductFacetAPIViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        root = models.Category.objects.create(title='Phones')
+        category = models.Category.objects.create(title='Smartphones', parent=root)
+        for title, ram, color in (('A', '8GB', 'Black'), ('B', '8 gb', 'White'), ('C', '4GB', 'Black')):
+            product = models.Product.objects.create(title=title, price=100, category=category)
+            models.ProductCharacteristics.objects.create(product=product, title='RAM', value=ram.replace(' ', ''))
+            models.ProductCharacteristics.objects.create(product=product, title='Color ', value=color)
+
+    def setUp(self):
+        # Facet indexes outlive the rolled-back rows of other tests.
+        cache.clear()
+
+    def get(self, *facets):
+        return self.client.get(reverse('product-facets'), {'category': 'phones', 'facet': list(facets)}).data
+
+    def counts(self, data, attribute):
+        facet = next(facet for facet in data['facets'] if facet['attribute'] == attribute)
+        return {value['value']: value['count'] for value in facet['values']}
+
+    def test_facets_are_intersected_across_attributes(self):
+        data = self.get('ram:8gb', 'Color:Black')
+        self.assertEqual([product['title'] for product in data['results']], ['A'])
+        self.assertEqual(self.counts(data, 'RAM'), {'8GB': 1, '4GB': 1})
+        self.assertEqual(self.counts(data, 'Color'), {'Black': 1, 'White': 1})
+
+    def test_values_of_one_attribute_are_combined(self):
+        data = self.get('Color:Black', 'Color:White')
+        self.assertEqual(data['count'], 3)
+        self.assertEqual(self.counts(data, 'RAM'), {'8GB': 2, '4GB': 1})
+
+    def test_moving_a_category_invalidates_both_ancestor_chains(self):
+        gadgets = models.Category.objects.create(title='Gadgets')
+        self.assertEqual(self.get()['count'], 3)
+        self.assertEqual(self.client.get(reverse('product-facets'), {'category': 'gadgets'}).data['count'], 0)
+        smartphones = models.Category.objects.get(slug='smartphones')
+        with self.captureOnCommitCallbacks(execute=True):
+            smartphones.parent = gadgets
+            smartphones.save()
+        self.assertEqual(self.get()['count'], 0)
+        self.assertEqual(self.client.get(reverse('product-facets'), {'category': 'gadgets'}).data['count'], 3)
+
+    def test_moving_a_product_invalidates_both_categories(self):
+        audio = models.Category.objects.create(title='Audio')
+        headphones = models.Category.objects.create(title='Headphones', parent=audio)
+        self.assertEqual(self.get()['count'], 3)
+        product = models.Product.objects.get(title='C')
+        with self.captureOnCommitCallbacks(execute=True):
+            product.category = headphones
+            product.save()
+        self.assertEqual(self.get()['count'], 2)
+        data = self.client.get(reverse('product-facets'), {'category': 'audio'}).data
+        self.assertEqual(self.counts(data, 'RAM'), {'4GB': 1})
+
+
+class CatalogImportTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = models.Category.objects.create(title='Phones')
+        cls.existing = models.Product.objects.create(title='Galaxy', price=100, category=cls.category)
+        models.ProductCharacteristics.objects.create(product=cls.existing, title='RAM', value='4GB')
+
+    def test_rows_are_upserted_on_slug(self):
+        rows = io.StringIO(
+            'slug,title,category,price,quantity,characteristics\n'
+            'galaxy,Galaxy,phones,120,5,"[{""title"": ""RAM"", ""value"": ""8GB""}]"\n'
+            ',Galaxy,phones,90,1,\n'
+            ',Pixel,tablets,80,1,\n'
+        )
+        result = import_catalog(read_rows(rows, 'csv'))
+        self.assertEqual((result.created, result.updated, result.skipped), (1, 1, 1))
+        self.assertEqual(result.errors, [(4, "unknown category 'tablets'")])
+        self.existing.refresh_from_db()
+        self.assertEqual((self.existing.price, self.existing.quantity), (120, 5))
+        self.assertEqual(list(self.existing.characteristics.values_list('value', flat=True)), ['8GB'])
+        self.assertEqual(models.Product.objects.get(price=90).slug, 'galaxy-2')
+
+    def test_bad_rows_are_reported_without_failing_the_import(self):
+        rows = io.StringIO('\n'.join([
+            '{"title": "Pixel", "category": "phones", "price": "NaN"}',
+            '{"title": "Pixel", "category": "phones", "price": 80, "quantity": -3}',
+            '{"title": "Pixel", "category": "phones"',
+            '["not", "an", "object"]',
+            json.dumps({'title': 'x' * 300, 'category': 'phones', 'price': 80}),
+            json.dumps({'slug': 'pixel-' * 20, 'title': 'Pixel', 'category': 'phones', 'price': 80}),
+            '{"title": "Pixel", "category": "phones", "price": 80, "quantity": 3}',
+        ]))
+        result = import_catalog(read_rows(rows, 'jsonl'))
+        self.assertEqual((result.created, result.skipped), (1, 6))
+        self.assertEqual([line for line, _ in result.errors], [1, 2, 3, 4, 5, 6])
+        self.assertTrue(result.errors[0][1].startswith('price:'))
+        self.assertTrue(result.errors[2][1].startswith('invalid JSON'))
+        self.assertTrue(result.errors[5][1].startswith('slug:'))
+
+    @override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+    def test_failed_import_still_reports_a_summary(self):
+        name = default_storage.save('imports/job.csv', ContentFile(b'title,category,price\nPixel,phones,80\n'))
+        with mock.patch.object(CatalogImport, '_import_chunk', side_effect=DatabaseError('value too long')):
+            with self.assertRaises(DatabaseError):
+                import_catalog_file(name, 'csv', 'job')
+        self.assertEqual(get_import_result('job')['failed'], 'value too long')
+        self.assertFalse(default_storage.exists(name))
+
+    @override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+    def test_admin_upload_runs_as_a_task(self):
+        admin = User.objects.create(phone='+998901234567', is_staff=True, is_superuser=True)
+        self.client.force_login(admin)
+        upload = SimpleUploadedFile('catalog.csv', b'title,category,price\nPixel,phones,80\n')
+        url = reverse('admin:common_product_import')
+        response = self.client.post(url, {'file': upload, 'format': 'csv'})
+        self.assertEqual(response.status_code, 302)
+        response = self.client.get(response['Location'])
+        self.assertEqual(response.context['result']['created'], 1)
+        self.assertTrue(models.Product.objects.filter(title='Pixel').exists())
+
+    def test_export_round_trips_through_import(self):
+        exported = ''.join(render_rows(export_rows(chunk_size=1), 'jsonl'))
+        models.Product.objects.update(price=1)
+        result = import_catalog(read_rows(io.StringIO(exported), 'jsonl'), chunk_size=1)
+        self.assertEqual((result.created, result.updated), (0, 1))
+        self.assertEqual(models.Product.objects.get().price, 100)
+        self.assertEqual(models.ProductCharacteristics.objects.get().value, '4GB')
+
+
+class CatalogCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.brand = models.Brand.objects.create(name='Samsung', image='brand/samsung.jpg')
+        cls.section = models.Section.objects.create(name='Hits')
+
+    def setUp(self):
+        cache.clear()
+
+    def assert_cached_until_saved(self, url, instance, field, value):
+        self.client.get(url)
+        # Only the ATOMIC_REQUESTS savepoint pair while the list is cached.
+        with self.assertNumQueries(2):
+            self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            setattr(instance, field, value)
+            instance.save()
+        self.assertIn(value, [row[field] for row in self.client.get(url).data])
+
+    def test_saving_a_brand_invalidates_the_brand_list(self):
+        self.assert_cached_until_saved(reverse('brand-list'), self.brand, 'name', 'Apple')
+
+    def test_saving_a_section_invalidates_the_section_list(self):
+        self.assert_cached_until_saved(reverse('section-list'), self.section, 'name', 'Best sellers')
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.banner = models.Banner.objects.create(title='Sale', image='banner/sale.jpg')
+        category = models.Category.objects.create(title='Phones')
+        cls.product = models.Product.objects.create(title='Galaxy', price=100, category=category)
+
+    def test_banners_revalidate_without_touching_the_database(self):
+        url = reverse('banner-list')
+        etag = self.client.get(url)['ETag']
+        # Only the ATOMIC_REQUESTS savepoint pair.
+        with self.assertNumQueries(2):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, response['ETag']), (304, etag))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.banner.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_product_detail_revalidates_on_update_at(self):
+        url = reverse('product-detail', args=[self.product.slug])
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        models.Product.objects.filter(pk=self.product.pk).update(title='Galaxy S24', update_at=timezone.now())
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_product_detail_revalidates_on_related_changes(self):
+        url = reverse('product-detail', args=[self.product.slug])
+        response = self.client.get(url)
+        # update_at misses gallery and characteristic changes, so no Last-Modified.
+        self.assertNotIn('Last-Modified', response)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=http_date(time.time())).status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            models.Gallery.objects.create(product=self.product, image='gallery/galaxy.jpg')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+    def test_product_detail_counts_revalidated_views(self):
+        url = reverse('product-detail', args=[self.product.slug])
+        with mock.patch('apps.common.views.record_product_view') as record:
+            etag = self.client.get(url)['ETag']
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(record.call_args_list, [mock.call(self.product.pk)] * 2)
+
+    def test_product_list_etag_follows_product_saves(self):
+        url = reverse('product-list')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.title = 'Galaxy S24'
+            self.product.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class AsyncCatalogViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        models.Banner.objects.create(title='Sale', image='banner/sale.jpg')
+        models.Brand.objects.create(name='Samsung', image='brand/samsung.jpg')
+        parent = models.Category.objects.create(title='Phones')
+        category = models.Category.objects.create(title='Smartphones', parent=parent)
+        for i in range(3):
+            product = models.Product.objects.create(title=f'Galaxy {i}', price=100 + i, category=category)
+            models.Gallery.objects.create(product=product, image=f'gallery/{i}.jpg')
+            models.ProductCharacteristics.objects.create(product=product, title='RAM', value='8GB')
+
+    async def test_payloads_match_the_sync_views(self):
+        product = await models.Product.objects.afirst()
+        for name, args, params in [('banner-list', (), {}), ('brand-list', (), {}), ('section-list', (), {}),
+                                   ('category-menu', (), {}), ('product-list', (), {'limit': 2, 'search': 'galaxy'}),
+                                   ('product-detail', (product.slug,), {})]:
+            expected = await self.async_client.get(reverse(name, args=args), params)
+            response = await self.async_client.get(reverse(f'async-{name}', args=args), params)
+            self.assertEqual(response.status_code, 200, name)
+            body, sync_body = response.json(), expected.json()
+            if isinstance(body, dict) and 'next' in body:
+                # Links point at their own endpoint.
+                self.assertEqual(bool(body.pop('next')), bool(sync_body.pop('next')), name)
+            self.assertEqual(body, sync_body, name)
+
+    async def test_revalidation_and_errors(self):
+        url = reverse('async-product-list')
+        etag = (await self.async_client.get(url))['ETag']
+        self.assertEqual((await self.async_client.get(url, headers={'If-None-Match': etag})).status_code, 304)
+        for params in ({'category': 'x'}, {'category': '999'}, {'on_sale': 'yes'}, {'on_sale': 'false'}):
+            expected = await self.async_client.get(reverse('product-list'), params)
+            response = await self.async_client.get(url, params)
+            self.assertEqual(response.status_code, expected.status_code, params)
+            self.assertEqual(response.json(), expected.json(), params)
+        response = await self.async_client.get(reverse('async-product-detail', args=['missing']))
+        self.assertEqual(response.status_code, 404)
+
+
+class ProductViewCounterTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = models.Category.objects.create(title='Phones')
+        cls.first = models.Product.objects.create(title='Galaxy', price=100, category=category)
+        cls.second = models.Product.objects.create(title='iPhone', price=900, category=category)
+
+    def setUp(self):
+        self.redis = FakeRedis(decode_responses=True)
+        self.enterContext(mock.patch('apps.common.counters.get_redis', return_value=self.redis))
+
+    def view_counts(self):
+        return dict(models.Product.objects.order_by('pk').values_list('title', 'view_count'))
+
+    def test_views_are_flushed_into_view_count(self):
+        for product in (self.first, self.first, self.second):
+            counters.record_product_view(product.pk)
+        with mock.patch.object(counters, 'FLUSH_BATCH_SIZE', 1):
+            self.assertEqual(counters.flush_product_views(), 2)
+        self.assertEqual(self.view_counts(), {'Galaxy': 2, 'iPhone': 1})
+        self.assertEqual(self.redis.keys('counters:*'), [])
+        self.assertEqual(counters.flush_product_views(), 0)
+
+    def test_leftover_snapshot_is_flushed_first(self):
+        self.redis.hset(counters.PRODUCT_VIEWS_FLUSHING_KEY, self.first.pk, 5)
+        counters.record_product_view(self.second.pk)
+        self.assertEqual(counters.flush_product_views(), 1)
+        self.assertEqual(self.view_counts(), {'Galaxy': 5, 'iPhone': 0})
+        self.assertEqual(counters.flush_product_views(), 1)
+        self.assertEqual(self.view_counts(), {'Galaxy': 5, 'iPhone': 1})
+
+    def test_redis_outage_does_not_fail_the_view(self):
+        broken = mock.Mock(**{'hincrby.side_effect': RedisError})
+        with mock.patch('apps.common.counters.get_redis', return_value=broken):
+            counters.record_product_view(self.first.pk)
+
+
+class PresenceTest(TestCase):
+    def setUp(self):
+        self.redis = FakeRedis(decode_responses=True)
+        patcher = mock.patch('apps.common.presence.get_redis', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def touch(self, **headers):
+        request = RequestFactory().get('/', **headers)
+        request.user = AnonymousUser()
+        presence.touch(request)
+
+    def members(self, key=presence.VISITORS_KEY):
+        return self.redis.zrange(key, 0, -1)
+
+    def test_bearer_token_users_are_authenticated(self):
+        user = User.objects.create(phone='+998901234567')
+        self.touch(HTTP_AUTHORIZATION=f"Bearer {user.tokens()['access']}")
+        self.touch(HTTP_AUTHORIZATION='Bearer broken', REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(self.members(presence.AUTHENTICATED_KEY), [f'user:{user.pk}'])
+        self.assertEqual(presence.online_counts(5), {'total': 2, 'authenticated': 1, 'anonymous': 1})
+
+    def test_client_ids_are_validated(self):
+        visitor = '1b4e28ba-2fa1-11d2-883f-0016d3cca427'
+        self.touch(HTTP_X_VISITOR_UUID=visitor.upper())
+        self.touch(HTTP_X_VISITOR_UUID='x' * 500, HTTP_X_FORWARDED_FOR='203.0.113.5, 10.0.0.1')
+        self.touch(HTTP_X_FORWARDED_FOR='y' * 500, REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(sorted(self.members()), ['ip:10.0.0.2', 'ip:203.0.113.5', f'uuid:{visitor}'])
+
+    def test_sets_are_capped(self):
+        with mock.patch.object(presence, 'MAX_TRACKED_VISITORS', 3):
+            for i in range(5):
+                self.touch(REMOTE_ADDR=f'10.0.0.{i}')
+        self.assertEqual(sorted(self.members()), ['ip:10.0.0.2', 'ip:10.0.0.3', 'ip:10.0.0.4'])
+
+
+class MediaCleanupTest(TestCase):
+    def setUp(self):
+        media_root = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+        self.media_root = media_root
+        self.redis = FakeRedis(decode_responses=True)
+        self.enterContext(mock.patch('apps.common.media.get_redis', return_value=self.redis))
+
+    def write(self, *names):
+        for name in names:
+            path = os.path.join(self.media_root, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as file:
+                file.write(b'x')
+
+    def exists(self, name):
+        return os.path.exists(os.path.join(self.media_root, name))
+
+    def test_deleted_rows_queue_their_files(self):
+        self.write('brand/samsung.jpg')
+        brand = models.Brand.objects.create(name='Samsung', image='brand/samsung.jpg')
+        with self.captureOnCommitCallbacks(execute=True):
+            brand.delete()
+        self.assertEqual(self.redis.lrange(media.MEDIA_DELETE_QUEUE_KEY, 0, -1), ['brand/samsung.jpg'])
+        self.assertEqual(media.delete_queued_files(), 1)
+        self.assertFalse(self.exists('brand/samsung.jpg'))
+
+    def test_queue_failure_does_not_fail_the_delete(self):
+        brand = models.Brand.objects.create(name='Samsung', image='brand/samsung.jpg')
+        broken = mock.Mock(**{'rpush.side_effect': RedisError})
+        with mock.patch('apps.common.media.get_redis', return_value=broken), \
+                self.assertLogs('apps.common.media', 'WARNING'):
+            with self.captureOnCommitCallbacks(execute=True):
+                brand.delete()
+        self.assertFalse(models.Brand.objects.exists())
+
+    def test_sweep_keeps_referenced_files(self):
+        category = models.Category.objects.create(title='Phones')
+        product = models.Product.objects.create(title='Galaxy', price=100, category=category)
+        models.Gallery.objects.create(product=product, image='gallery/kept.jpg')
+        kept = ['gallery/kept.jpg', 'variants/gallery/kept.jpg-320w.webp']
+        orphans = ['gallery/orphan.jpg', 'variants/gallery/orphan.jpg-320w.webp', 'variants/gallery/kept.png-320w.webp']
+        self.write(*kept, *orphans)
+
+        out = io.StringIO()
+        call_command('sweep_orphaned_media', '--dry-run', '--min-age', '0', stdout=out)
+        self.assertEqual(sorted(out.getvalue().splitlines()[:-1]), sorted(orphans))
+        self.assertTrue(all(self.exists(name) for name in orphans))
+
+        call_command('sweep_orphaned_media', '--min-age', '0', stdout=io.StringIO())
+        self.assertEqual([name for name in kept + orphans if self.exists(name)], kept)
+
+
+class ImageVariantTest(TestCase):
+    def setUp(self):
+        self.enterContext(override_settings(MEDIA_ROOT=self.enterContext(tempfile.TemporaryDirectory())))
+
+    def save_image(self, name, size):
+        buffer = io.BytesIO()
+        Image.new('RGB', size, 'red').save(buffer, Image.registered_extensions()[os.path.splitext(name)[1]])
+        return default_storage.save(name, ContentFile(buffer.getvalue()))
+
+    def test_variants_of_same_named_images_do_not_collide(self):
+        jpg = images.render_variants(self.save_image('gallery/photo.jpg', (800, 600)))
+        png = images.render_variants(self.save_image('gallery/photo.png', (800, 600)))
+        self.assertEqual(jpg['source'], 'gallery/photo.jpg')
+        self.assertEqual(jpg['webp'], {'320': 'variants/gallery/photo.jpg-320w.webp',
+                                       '640': 'variants/gallery/photo.jpg-640w.webp',
+                                       '800': 'variants/gallery/photo.jpg-800w.webp'})
+        self.assertEqual(png['webp']['320'], 'variants/gallery/photo.png-320w.webp')
+        with default_storage.open(jpg['webp']['640']) as file:
+            self.assertEqual(Image.open(file).size, (640, 480))
+
+    def test_variants_are_stored_for_the_current_image_only(self):
+        category = models.Category.objects.create(title='Phones')
+        product = models.Product.objects.create(title='Galaxy', price=100, category=category)
+        gallery = models.Gallery.objects.create(product=product, image=self.save_image('gallery/a.jpg', (400, 300)))
+        variants = images.generate_variants(models.Gallery, gallery.pk, 'image')
+        gallery.refresh_from_db()
+        self.assertEqual(gallery.image_variants, variants)
+        self.assertEqual(images.build_srcset(gallery.image.name, gallery.image_variants),
+                         '/media/variants/gallery/a.jpg-320w.webp 320w, /media/variants/gallery/a.jpg-400w.webp 400w')
+        self.assertIsNone(images.build_srcset('gallery/b.jpg', gallery.image_variants))
@@ -2,5 +2,13 @@ from django.urls import path
 from . import views
 
 urlpatterns = [
-    path('banners/', views.BannerListAPIView.as_view(), name='banner-list')
-]
\ No newline at end of file
+    path('banners/', views.BannerListAPIView.as_view(), name='banner-list'),
+    path('brands/', views.BrandListAPIView.as_view(), name='brand-list'),
+    path('sections/', views.SectionListAPIView.as_view(), name='section-list'),
+    path('sections/<str:code>/', views.SectionFeedAPIView.as_view(), name='section-feed'),
+    path('categories/', views.CategoryMenuAPIView.as_view(), name='category-menu'),
+    path('products/', views.ProductListAPIView.as_view(), name='product-list'),
+    path('products/facets/', views.ProductFacetAPIView.as_view(), name='product-facets'),
+    path('products/search/', views.ProductSearchAPIView.as_view(), name='product-search'),
+    path('products/<slug:slug>/', views.ProductDetailAPIView.as_view(), name='product-detail'),
+]
@@ -1,10 +1,122 @@
+import django_filters
 from django.shortcuts import render
 from . import serializers
 from rest_framework import generics
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.views import APIView
+from rest_framework.response import Response
 from . import models
+from .cache import CatalogCacheMixin
+from .conditional import ConditionalGetMixin
+from .counters import record_product_view
+from .feeds import get_section_feed
+from .facets import facet_search, parse_selection
+from django.shortcuts import get_object_or_404
+from django.http import Http404
 
+# 'product' is bumped on every product save/delete, reprice and bulk import.
+# Cards also embed the category title, images and characteristics.
+PRODUCT_NAMESPACES = ('product', 'category', 'gallery', 'productcharacteristics')
 
-class BannerListAPIView(generics.ListAPIView):
+
+class BannerListAPIView(ConditionalGetMixin, CatalogCacheMixin, generics.ListAPIView):
     queryset = models.Banner.objects.filter(banner_type='banner').order_by('order')
     serializer_class = serializers.BannerListSerializers
+    keyset_ordering = ('order', 'id')
+    cache_namespace = 'banner'
+
+
+class BrandListAPIView(ConditionalGetMixin, CatalogCacheMixin, generics.ListAPIView):
+    queryset = models.Brand.objects.order_by('order')
+    serializer_class = serializers.BrandListSerializers
     pagination_class = None
+    cache_namespace = 'brand'
+
+
+class SectionListAPIView(ConditionalGetMixin, CatalogCacheMixin, generics.ListAPIView):
+    queryset = models.Section.objects.order_by('id')
+    serializer_class = serializers.SectionListSerializers
+    pagination_class = None
+    cache_namespace = 'section'
+
+
+class SectionFeedAPIView(APIView):
+    def get(self, request, code, *args, **kwargs):
+        payload = get_section_feed(code)
+        if payload is None:
+            raise Http404
+        return Response(payload)
+
+
+class CategoryMenuAPIView(ConditionalGetMixin, APIView):
+    conditional_namespaces = ('category',)
+
+    def get(self, request, *args, **kwargs):
+        return Response(models.Category.objects.menu_tree())
+
+
+class ProductFilter(django_filters.FilterSet):
+    class Meta:
+        model = models.Product
+        fields = ('category', 'on_sale')
+
+
+class ProductListAPIView(ConditionalGetMixin, generics.ListAPIView):
+    queryset = models.Product.objects.with_card_data().order_by('-created_at', '-id')
+    serializer_class = serializers.ProductListSerializers
+    conditional_namespaces = PRODUCT_NAMESPACES
+    filterset_class = ProductFilter
+    search_fields = ('title',)
+
+
+class ProductSearchAPIView(generics.ListAPIView):
+    serializer_class = serializers.ProductListSerializers
+    filter_backends = ()
+    # Results are ordered by rank, which has no stable keyset.
+    pagination_class = LimitOffsetPagination
+
+    def get_queryset(self):
+        query = self.request.query_params.get('q', '')
+        return models.Product.objects.with_card_data().search(query)
+
+
+class ProductFacetAPIView(generics.ListAPIView):
+    """
+    Products of a category subtree filtered by characteristics, e.g.
+    ``?category=phones&facet=RAM:8GB&facet=Color:Black``, with per-value counts.
+    """
+    queryset = models.Product.objects.with_card_data()
+    serializer_class = serializers.ProductListSerializers
+    filter_backends = ()
+    pagination_class = LimitOffsetPagination
+
+    def list(self, request, *args, **kwargs):
+        category = get_object_or_404(models.Category, slug=request.query_params.get('category'))
+        ids, facets = facet_search(category, parse_selection(request.query_params.getlist('facet')))
+        # Paginate the ids in memory and only load the products of this page.
+        page = self.paginate_queryset(sorted(ids, reverse=True))
+        products = self.get_queryset().in_bulk(page)
+        serializer = self.get_serializer([products[pk] for pk in page if pk in products], many=True)
+        response = self.get_paginated_response(serializer.data)
+        response.data['facets'] = facets
+        return response
+
+
+class ProductDetailAPIView(ConditionalGetMixin, generics.RetrieveAPIView):
+    queryset = models.Product.objects.with_detail_data()
+    serializer_class = serializers.ProductDetailSerializers
+    lookup_field = 'slug'
+    conditional_namespaces = PRODUCT_NAMESPACES
+    conditional_timestamps = True
+
+    def get_conditional_stats(self):
+        row = self.get_conditional_queryset().order_by().values('pk', 'update_at').first()
+        self.product_id = row['pk'] if row else None
+        return {'latest': row['update_at'] if row else None, 'count': int(bool(row))}
+
+    def get(self, request, *args, **kwargs):
+        response = super().get(request, *args, **kwargs)
+        # A revalidated (304) read is a view as well.
+        if self.product_id is not None and response.status_code in (200, 304):
+            record_product_view(self.product_id)
+        return response
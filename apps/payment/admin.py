@@ -1,3 +1,24 @@
 from django.contrib import admin
+from django.utils.translation import gettext_lazy as _
+from .dispatch import plan_branch
+from .models import Branch
 
-# Register your models here.
+
+@admin.register(Branch)
+class BranchAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'latitude', 'longitude', 'archive')
+    list_filter = ('archive',)
+    search_fields = ('name',)
+    actions = ('plan_courier_batches',)
+
+    @admin.action(description=_("Plan courier batches"))
+    def plan_courier_batches(self, request, queryset):
+        for branch in queryset:
+            batches = plan_branch(branch)
+            if not batches:
+                self.message_user(request, _("%(branch)s: no orders to dispatch") % {'branch': branch})
+            for number, batch in enumerate(batches, 1):
+                self.message_user(request, _("%(branch)s, courier %(number)s: orders %(orders)s, %(distance)s km") % {
+                    'branch': branch, 'number': number,
+                    'orders': ', '.join(map(str, batch['orders'])), 'distance': batch['distance'],
+                })
@@ -3,4 +3,4 @@ from django.apps import AppConfig
 
 class PaymentConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'payment'
+    name = 'apps.payment'
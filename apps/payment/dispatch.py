@@ -0,0 +1,94 @@
+import numpy as np
+from django.core.cache import cache
+from .geo import haversine
+from .models import Branch, Order
+
+DEFAULT_BATCH_SIZE = 8
+PLAN_CACHE_TIMEOUT = 60 * 60
+
+
+def _plan_key(branch_id):
+    return f'dispatch:{branch_id}:plan'
+
+
+def dispatchable_orders(branch):
+    """Approved delivery orders of the branch that no courier has taken yet."""
+    return Order.objects.filter(
+        branch=branch, status=Order.OrderStatus.APPROVED, order_type=Order.OrderType.DELIVERY,
+        process=Order.ProcessStatus.NEW, latitude__isnull=False, longitude__isnull=False,
+    ).order_by('pk')
+
+
+def _sweep(lat, lon, lats, lons, size):
+    """
+    Splits the stops into batches of at most ``size`` by their bearing from
+    the depot, starting the sweep at the widest empty sector.
+    """
+    lat, lon, rlats, rlons = map(np.radians, (lat, lon, lats, lons))
+    bearings = np.arctan2(
+        np.sin(rlons - lon) * np.cos(rlats),
+        np.cos(lat) * np.sin(rlats) - np.sin(lat) * np.cos(rlats) * np.cos(rlons - lon),
+    )
+    order = np.argsort(bearings)
+    gaps = np.diff(np.append(bearings[order], bearings[order[0]] + 2 * np.pi))
+    order = np.roll(order, -(int(np.argmax(gaps)) + 1))
+    return [order[i:i + size] for i in range(0, len(order), size)]
+
+
+def _route(lat, lon, lats, lons):
+    """Orders the stops of one batch greedily by the nearest unvisited stop."""
+    from_depot = haversine(lat, lon, lats, lons)
+    matrix = haversine(lats[:, None], lons[:, None], lats[None, :], lons[None, :])
+    unvisited = np.ones(len(lats), dtype=bool)
+    distances = from_depot
+    route, total = [], 0.0
+    for _ in range(len(lats)):
+        current = int(np.argmin(np.where(unvisited, distances, np.inf)))
+        total += float(distances[current])
+        unvisited[current] = False
+        route.append(current)
+        distances = matrix[current]
+    return route, total
+
+
+def plan_batches(lat, lon, stops, size=DEFAULT_BATCH_SIZE):
+    """
+    Groups ``(order_id, latitude, longitude)`` stops around the depot at
+    ``lat``/``lon`` into courier batches. Each batch lists its order ids in
+    visiting order together with the route length in km.
+    """
+    stops = list(stops)
+    if not stops:
+        return []
+    ids = np.array([stop[0] for stop in stops], dtype=np.int64)
+    lats = np.array([stop[1] for stop in stops], dtype=np.float64)
+    lons = np.array([stop[2] for stop in stops], dtype=np.float64)
+    batches = []
+    for members in _sweep(lat, lon, lats, lons, size):
+        route, distance = _route(lat, lon, lats[members], lons[members])
+        batches.append({
+            'orders': [int(ids[members[i]]) for i in route],
+            'distance': round(distance, 2),
+        })
+    return batches
+
+
+def plan_branch(branch, size=DEFAULT_BATCH_SIZE):
+    """Plans the courier batches of a branch and keeps the plan for an hour."""
+    if branch.latitude is None or branch.longitude is None:
+        return []
+    stops = dispatchable_orders(branch).values_list('pk', 'latitude', 'longitude')
+    batches = plan_batches(branch.latitude, branch.longitude, stops, size)
+    cache.set(_plan_key(branch.pk), batches, PLAN_CACHE_TIMEOUT)
+    return batches
+
+
+def get_plan(branch_id):
+    return cache.get(_plan_key(branch_id))
+
+
+def plan_all_branches(size=DEFAULT_BATCH_SIZE):
+    return {
+        branch.pk: plan_branch(branch, size)
+        for branch in Branch.objects.filter(archive=False, latitude__isnull=False, longitude__isnull=False)
+    }
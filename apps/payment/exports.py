@@ -0,0 +1,62 @@
+import csv
+import django_filters
+from django.db.models import Prefetch
+from apps.common.catalog import Echo
+from .models import Order, ProductCountOrder
+
+EXPORT_CHUNK_SIZE = 2000
+
+ORDER_EXPORT_FIELDS = (
+    'order_id', 'created_at', 'status', 'process', 'order_type', 'provider', 'customer_name', 'phone_number',
+    'address', 'latitude', 'longitude', 'branch_id', 'branch', 'user_id', 'user_phone', 'total_amount',
+    'product_amount', 'shipping_amount', 'product_id', 'product', 'quantity', 'amount',
+)
+
+
+class OrderExportFilter(django_filters.FilterSet):
+    date_from = django_filters.DateFilter(field_name='created_at', lookup_expr='date__gte')
+    date_to = django_filters.DateFilter(field_name='created_at', lookup_expr='date__lte')
+
+    class Meta:
+        model = Order
+        fields = ('status', 'provider', 'branch')
+
+
+def export_queryset(params):
+    """Returns the filtered orders to export, or raises ``ValueError`` with the form errors."""
+    filterset = OrderExportFilter(params, queryset=Order.objects.all())
+    if not filterset.is_valid():
+        raise ValueError(filterset.errors)
+    lines = ProductCountOrder.objects.select_related('product').only(
+        'order_id', 'product_id', 'product__title', 'quantity', 'amount'
+    ).order_by('pk')
+    return filterset.qs.select_related('branch', 'user').prefetch_related(
+        Prefetch('product_orders', queryset=lines)
+    ).order_by('pk')
+
+
+def export_order_rows(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yields one row per order line; orders without lines get a single row.
+    ``iterator()`` reads through a server-side cursor where the database has
+    one and fetches the lines once per chunk of orders.
+    """
+    for order in queryset.iterator(chunk_size=chunk_size):
+        head = [
+            order.pk, order.created_at.isoformat(), order.status, order.process, order.order_type, order.provider,
+            order.customer_name, str(order.phone_number), order.address, order.latitude, order.longitude,
+            order.branch_id, order.branch.name if order.branch_id else '', order.user_id, str(order.user.phone),
+            order.total_amount, order.product_amount, order.shipping_amount,
+        ]
+        lines = order.product_orders.all()
+        if not lines:
+            yield head + ['', '', '', '']
+        for line in lines:
+            yield head + [line.product_id, line.product.title, line.quantity, line.amount]
+
+
+def render_csv(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(ORDER_EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow(row)
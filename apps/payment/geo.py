@@ -0,0 +1,67 @@
+import numpy as np
+from apps.common.cache import LocalCopy
+
+EARTH_RADIUS_KM = 6371.0088
+BRANCH_CACHE_NAMESPACE = 'branch'
+BRANCH_INDEX_LOCAL_TTL = 30
+
+
+def haversine(lat, lon, lats, lons):
+    """
+    Great-circle distances in km from one or many points (``lat``/``lon``,
+    broadcastable) to the points ``lats``/``lons``, all in degrees.
+    """
+    lat, lon, lats, lons = map(np.radians, (lat, lon, lats, lons))
+    a = np.sin((lats - lat) / 2) ** 2 + np.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+class BranchIndex:
+    """Coordinates of the non-archived branches held as arrays for vectorized lookups."""
+
+    def __init__(self, rows):
+        rows = list(rows)
+        self.ids = np.array([row[0] for row in rows], dtype=np.int64)
+        self.lats = np.array([row[1] for row in rows], dtype=np.float64)
+        self.lons = np.array([row[2] for row in rows], dtype=np.float64)
+
+    @classmethod
+    def build(cls):
+        from .models import Branch
+
+        return cls(Branch.objects.filter(archive=False, latitude__isnull=False, longitude__isnull=False)
+                   .order_by('pk').values_list('pk', 'latitude', 'longitude'))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def nearest(self, lat, lon, k=1):
+        """Returns up to ``k`` ``(branch_id, distance_km)`` pairs, closest first."""
+        if not len(self) or lat is None or lon is None:
+            return []
+        distances = haversine(lat, lon, self.lats, self.lons)
+        k = min(k, len(self))
+        closest = np.argpartition(distances, k - 1)[:k]
+        closest = closest[np.argsort(distances[closest])]
+        return [(int(self.ids[i]), float(distances[i])) for i in closest]
+
+
+_index = LocalCopy(BRANCH_CACHE_NAMESPACE, BranchIndex.build, BRANCH_INDEX_LOCAL_TTL)
+
+
+def branch_index():
+    """Returns the process-local branch index, see ``LocalCopy``."""
+    return _index.get()
+
+
+def clear_branch_index():
+    _index.clear()
+
+
+def assign_nearest_branch(order):
+    """Sets ``order.branch`` to the closest branch and returns the distance in km."""
+    nearest = branch_index().nearest(order.latitude, order.longitude)
+    if not nearest:
+        return None
+    order.branch_id, distance = nearest[0]
+    return distance
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+from apps.payment.exports import EXPORT_CHUNK_SIZE, export_order_rows, export_queryset, render_csv
+
+
+class Command(BaseCommand):
+    help = "Streams orders with their lines, branch and customer out as CSV"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', help="Defaults to stdout")
+        parser.add_argument('--date-from', help="YYYY-MM-DD")
+        parser.add_argument('--date-to', help="YYYY-MM-DD")
+        parser.add_argument('--status')
+        parser.add_argument('--provider')
+        parser.add_argument('--branch', help="Branch id")
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, path, chunk_size, **options):
+        params = {name: options[name] for name in ('date_from', 'date_to', 'status', 'provider', 'branch')
+                  if options[name]}
+        try:
+            queryset = export_queryset(params)
+        except ValueError as exc:
+            raise CommandError(exc.args[0].as_text())
+        stream = open(path, 'w', encoding='utf-8', newline='') if path else self.stdout
+        try:
+            stream.writelines(render_csv(export_order_rows(queryset, chunk_size)))
+        finally:
+            if path:
+                stream.close()
@@ -0,0 +1,113 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:20
+
+import django.core.validators
+import django.db.models.deletion
+import phonenumber_field.modelfields
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('common', '0004_product_quantity'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Branch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('update_at', models.DateTimeField(auto_now=True)),
+                ('name', models.CharField(max_length=255, verbose_name='Branch Name')),
+                ('description', models.CharField(blank=True, max_length=255, null=True, verbose_name='Branch Description')),
+                ('longitude', models.FloatField(blank=True, null=True, verbose_name='Longitude')),
+                ('latitude', models.FloatField(blank=True, null=True, verbose_name='Latitude')),
+                ('location', models.URLField(max_length=300000, null=True, verbose_name='Location URL')),
+                ('support_phone', models.CharField(max_length=255, null=True, validators=[django.core.validators.RegexValidator(code='invalid', message="Phone number doesn't match", regex='^\\+998\\d{9}$')], verbose_name='Support Phone')),
+                ('archive', models.BooleanField(default=False, verbose_name='Archive')),
+            ],
+            options={
+                'verbose_name': 'Branch',
+                'verbose_name_plural': 'Branches',
+            },
+        ),
+        migrations.CreateModel(
+            name='Settings',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('update_at', models.DateTimeField(auto_now=True)),
+                ('shipping_cost', models.DecimalField(decimal_places=2, default=0, help_text='The shipping cost is the amount charged to deliver the order in USD', max_digits=10, verbose_name='Shipping cost in USD')),
+                ('minute', models.PositiveIntegerField(default=0, help_text='This shows users who have logged in in the last few minutes', verbose_name='Minute')),
+                ('usd_to_uzs_rate', models.DecimalField(decimal_places=2, default=0, help_text='Exchange rate from USD to UZS', max_digits=12, verbose_name='USD to UZS Exchange Rate')),
+                ('last_updated', models.DateTimeField(auto_now=True, help_text='The date and time when the exchange rate was last updated', verbose_name='Last Updated')),
+            ],
+            options={
+                'verbose_name': 'Settings',
+                'verbose_name_plural': 'Settings',
+            },
+        ),
+        migrations.CreateModel(
+            name='ApplicationForMoreProduct',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('update_at', models.DateTimeField(auto_now=True)),
+                ('quantity', models.PositiveIntegerField(verbose_name='Quantity')),
+                ('phone_number', models.CharField(max_length=20, verbose_name='Phone number')),
+                ('customer_name', models.CharField(max_length=255, verbose_name='Customer Name')),
+                ('products', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='applications', to='common.product', verbose_name='Product')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='applications', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Application for product',
+                'verbose_name_plural': 'Application for products',
+            },
+        ),
+        migrations.CreateModel(
+            name='Order',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('update_at', models.DateTimeField(auto_now=True)),
+                ('phone_number', phonenumber_field.modelfields.PhoneNumberField(max_length=128, region=None, verbose_name='Phone number')),
+                ('customer_name', models.CharField(max_length=255, null=True, verbose_name='Customer Name')),
+                ('address', models.CharField(blank=True, max_length=255, null=True, verbose_name='Address')),
+                ('description', models.TextField(blank=True, null=True, verbose_name='Description')),
+                ('total_amount', models.PositiveIntegerField(default=1, verbose_name='Total Amount')),
+                ('longitude', models.FloatField(blank=True, null=True, verbose_name='Longitude')),
+                ('latitude', models.FloatField(blank=True, null=True, verbose_name='Latitude')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('approved', 'Approved'), ('cancelled', 'Cancelled')], default='pending', max_length=255, verbose_name='Status')),
+                ('order_type', models.CharField(choices=[('delivery', 'Delivery'), ('take_away', 'Take away')], default='delivery', max_length=255, verbose_name='Order Type')),
+                ('process', models.CharField(choices=[('new', 'New'), ('in_courier', 'In courier'), ('delivered', 'Delivered')], default='new', max_length=255, verbose_name='Process Type')),
+                ('provider', models.CharField(choices=[('click', 'Click'), ('payme', 'Payme'), ('payze', 'Payze'), ('cash', 'Cash')], default='cash', max_length=255, verbose_name='Provider Type')),
+                ('branch', models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='orders', to='payment.branch', verbose_name='Branch')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='orders', to=settings.AUTH_USER_MODEL, verbose_name='User')),
+            ],
+            options={
+                'verbose_name': 'Order',
+                'verbose_name_plural': 'Orders',
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductCountOrder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('update_at', models.DateTimeField(auto_now=True)),
+                ('quantity', models.PositiveIntegerField(verbose_name='Quantity')),
+                ('amount', models.PositiveIntegerField(verbose_name='Amount')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='product_orders', to='payment.order', verbose_name='Order')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='product_orders', to='common.product', verbose_name='Product')),
+            ],
+            options={
+                'verbose_name': 'Product count order',
+                'verbose_name_plural': 'Product count orders',
+            },
+        ),
+    ]
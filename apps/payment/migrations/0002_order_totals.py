@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:21
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def populate_totals(apps, schema_editor):
+    Order = apps.get_model('payment', 'Order')
+    ProductCountOrder = apps.get_model('payment', 'ProductCountOrder')
+    lines = ProductCountOrder.objects.filter(order=OuterRef('pk')).order_by().values('order')
+    amount = Coalesce(Subquery(lines.annotate(total=Sum('amount')).values('total')), 0)
+    Order.objects.update(product_amount=amount, shipping_amount=F('total_amount') - amount)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payment', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='product_amount',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Product Amount'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='shipping_amount',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Shipping Amount'),
+        ),
+        migrations.RunPython(populate_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0007_image_variants'),
+        ('payment', '0002_order_totals'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('value', models.DateTimeField(null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailySalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Date')),
+                ('provider', models.CharField(choices=[('click', 'Click'), ('payme', 'Payme'), ('payze', 'Payze'), ('cash', 'Cash')], max_length=255, verbose_name='Provider Type')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('approved', 'Approved'), ('cancelled', 'Cancelled')], max_length=255, verbose_name='Status')),
+                ('quantity', models.PositiveIntegerField(default=0, verbose_name='Quantity')),
+                ('amount', models.PositiveBigIntegerField(default=0, verbose_name='Amount')),
+                ('orders_count', models.PositiveIntegerField(default=0, verbose_name='Orders count')),
+                ('branch', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='sales_rollups', to='payment.branch', verbose_name='Branch')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sales_rollups', to='common.product', verbose_name='Product')),
+            ],
+            options={
+                'verbose_name': 'Sales dashboard',
+                'verbose_name_plural': 'Sales dashboard',
+                'indexes': [models.Index(fields=['date'], name='payment_dai_date_53feca_idx')],
+                'constraints': [models.UniqueConstraint(fields=('date', 'product', 'branch', 'provider', 'status'), name='unique_daily_sales_rollup')],
+            },
+        ),
+    ]
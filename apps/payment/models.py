@@ -1,13 +1,17 @@
-from django.db import models
 from django.conf import settings
-from django.db.models import Sum
-from .utils import check_quantity
+from django.utils import timezone
+from django.db.models.functions import Coalesce
+from django.db.models import F, OuterRef, Subquery, Sum
+from django.db import models, transaction
+from . import geo
+from .utils import check_quantity, reserve_stock
 from django.dispatch import receiver
 from apps.common.models import BaseModel
+from apps.common.cache import LocalCopy, bump_version
 from django.core.validators import RegexValidator
 from django.utils.translation import gettext_lazy as _
 from django.core.exceptions import ValidationError
-from django.db.models.signals import post_migrate
+from django.db.models.signals import post_migrate, post_save, post_delete
 from phonenumber_field.modelfields import PhoneNumberField
 
 phone_validator = RegexValidator(
@@ -31,6 +35,24 @@ class Branch(BaseModel):
         return self.name
 
 
+def _lines_amount():
+    lines = ProductCountOrder.objects.filter(order=OuterRef('pk')).order_by().values('order')
+    return Coalesce(Subquery(lines.annotate(total=Sum('amount')).values('total')), 0)
+
+
+class OrderQuerySet(models.QuerySet):
+    def with_totals(self):
+        """Annotates product and shipping totals computed from the order lines."""
+        return self.annotate(product_total=_lines_amount()).annotate(
+            shipping_total=F('total_amount') - F('product_total')
+        )
+
+    def refresh_totals(self):
+        """Recomputes the stored totals of every order in the queryset with one UPDATE."""
+        return self.update(product_amount=_lines_amount(), shipping_amount=F('total_amount') - _lines_amount(),
+                           update_at=timezone.now())
+
+
 class Order(BaseModel):
     class OrderStatus(models.TextChoices):
         PENDING = 'pending', _('Pending')
@@ -61,14 +83,20 @@ class Order(BaseModel):
     latitude = models.FloatField(verbose_name=_("Latitude"), null=True, blank=True)
     user = models.ForeignKey('users.User', on_delete=models.PROTECT, related_name='orders', verbose_name=_("User"))
     branch = models.ForeignKey(Branch, on_delete=models.PROTECT, related_name='orders', verbose_name=_("Branch"), null=True)
-    status = models.CharField(max_length=255, choices=OrderStatus.choices, default=OrderStatus.DELIVERY, verbose_name=_("Status"))
+    status = models.CharField(max_length=255, choices=OrderStatus.choices, default=OrderStatus.PENDING, verbose_name=_("Status"))
     order_type = models.CharField(max_length=255, choices=OrderType.choices, default=OrderType.DELIVERY, verbose_name=_("Order Type"))
     process = models.CharField(max_length=255, choices=ProcessStatus.choices, default=ProcessStatus.NEW, verbose_name=_("Process Type"))
     provider = models.CharField(max_length=255, choices=ProviderType.choices, default=ProviderType.CASH, verbose_name=_("Provider Type"))
+    product_amount = models.PositiveIntegerField(default=0, editable=False, verbose_name=_("Product Amount"))
+    shipping_amount = models.IntegerField(default=0, editable=False, verbose_name=_("Shipping Amount"))
+
+    objects = OrderQuerySet.as_manager()
 
     class Meta:
         verbose_name = _("Order")
         verbose_name_plural = _("Orders")
+        # The sales rollup scans orders changed since its watermark.
+        indexes = [models.Index(fields=('update_at',))]
 
     def __str__(self):
         return f"{dict(self.OrderType.choices)[self.order_type]} || {self.id}"
@@ -76,15 +104,15 @@ class Order(BaseModel):
     def clean(self):
         if self.pk:
             old_order = Order.objects.get(pk=self.pk)
-            if self.status == OrderStatus.APPROVED and old_order.status != OrderStatus.APPROVED and not check_quantity(self):
+            approved = self.OrderStatus.APPROVED
+            if self.status == approved and old_order.status != approved and not check_quantity(self):
                 raise ValidationError(_('There is a shortage of products in the warehouse'))
 
     @property
     def amounts(self):
-        amount = self.product_orders.aggregate(Sum('amount'))['amount__sum'] or 0
         return {
-            "product_amount": amount,
-            "shipping_amount": self.total_amount - amount
+            "product_amount": self.product_amount,
+            "shipping_amount": self.shipping_amount
         }
 
     @property
@@ -100,13 +128,22 @@ class Order(BaseModel):
         return self.get_process_display()
 
     def save(self, *args, **kwargs):
-        if self.pk:
-            old_order = Order.objects.get(pk=self.pk)
-            if self.status == OrderStatus.APPROVED and old_order.status != OrderStatus.APPROVED:
-                for product_count in self.product_orders.all().select_related('product'):
-                    product_count.product.quantity -= product_count.quantity
-                    product_count.product.save()
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            if self.pk and self.status == self.OrderStatus.APPROVED:
+                # Flip the status with a conditional UPDATE first so only one of
+                # several concurrent approvals of the same order reserves stock.
+                flipped = Order.objects.filter(pk=self.pk).exclude(status=self.OrderStatus.APPROVED).update(
+                    status=self.OrderStatus.APPROVED
+                )
+                if flipped:
+                    reserve_stock(self)
+            if not self.branch_id:
+                geo.assign_nearest_branch(self)
+            if self.pk:
+                # The lines may have changed since this instance was loaded.
+                self.product_amount = self.product_orders.aggregate(Sum('amount'))['amount__sum'] or 0
+            self.shipping_amount = self.total_amount - self.product_amount
+            super().save(*args, **kwargs)
 
 
 class ProductCountOrder(BaseModel):
@@ -136,6 +173,40 @@ class ApplicationForMoreProduct(BaseModel):
         verbose_name_plural = _("Application for products")
 
 
+class DailySalesRollup(models.Model):
+    date = models.DateField(verbose_name=_("Date"))
+    product = models.ForeignKey('common.Product', on_delete=models.CASCADE, related_name='sales_rollups',
+                                verbose_name=_("Product"))
+    branch = models.ForeignKey(Branch, on_delete=models.CASCADE, related_name='sales_rollups', null=True,
+                               verbose_name=_("Branch"))
+    provider = models.CharField(max_length=255, choices=Order.ProviderType.choices, verbose_name=_("Provider Type"))
+    status = models.CharField(max_length=255, choices=Order.OrderStatus.choices, verbose_name=_("Status"))
+    quantity = models.PositiveIntegerField(default=0, verbose_name=_("Quantity"))
+    amount = models.PositiveBigIntegerField(default=0, verbose_name=_("Amount"))
+    orders_count = models.PositiveIntegerField(default=0, verbose_name=_("Orders count"))
+
+    class Meta:
+        verbose_name = _("Sales dashboard")
+        verbose_name_plural = _("Sales dashboard")
+        constraints = [
+            models.UniqueConstraint(fields=('date', 'product', 'branch', 'provider', 'status'),
+                                    name='unique_daily_sales_rollup'),
+        ]
+        indexes = [models.Index(fields=('date',))]
+
+
+class RollupWatermark(models.Model):
+    name = models.CharField(max_length=255, unique=True)
+    value = models.DateTimeField(null=True)
+
+    def __str__(self):
+        return self.name
+
+
+SETTINGS_LOCAL_TTL = 30
+SETTINGS_CACHE_NAMESPACE = 'settings'
+
+
 class Settings(BaseModel):
     shipping_cost = models.DecimalField(
         max_digits=10, decimal_places=2,
@@ -147,7 +218,7 @@ class Settings(BaseModel):
         help_text=_('This shows users who have logged in in the last few minutes')
     )
     usd_to_uzs_rate = models.DecimalField(
-        max_digits=12, decimal_places=2,
+        max_digits=12, decimal_places=2, default=0,
         verbose_name=_('USD to UZS Exchange Rate'),
         help_text=_('Exchange rate from USD to UZS'),
     )
@@ -159,12 +230,46 @@ class Settings(BaseModel):
     def __str__(self):
         return str(_('Settings for site configuration'))
 
+    @classmethod
+    def get_solo(cls):
+        """Returns the site settings row from an in-process copy, see ``LocalCopy``."""
+        return _solo.get()
+
+    @classmethod
+    def clear_solo_cache(cls):
+        _solo.clear()
+
     class Meta:
         verbose_name = _('Settings')
         verbose_name_plural = _('Settings')
 
 
+_solo = LocalCopy(SETTINGS_CACHE_NAMESPACE, lambda: Settings.objects.first() or Settings.objects.create(),
+                  SETTINGS_LOCAL_TTL)
+
+
 @receiver(post_migrate)
 def my_post_migrate_handler(sender, **kwargs):
     if not Settings.objects.exists():
-        Settings.objects.create()
\ No newline at end of file
+        Settings.objects.create()
+
+
+@receiver([post_save, post_delete], sender=Settings)
+def invalidate_settings_cache(sender, **kwargs):
+    def invalidate():
+        bump_version(SETTINGS_CACHE_NAMESPACE)
+        Settings.clear_solo_cache()
+    transaction.on_commit(invalidate)
+
+
+@receiver([post_save, post_delete], sender=Branch)
+def invalidate_branch_index(sender, **kwargs):
+    def invalidate():
+        bump_version(geo.BRANCH_CACHE_NAMESPACE)
+        geo.clear_branch_index()
+    transaction.on_commit(invalidate)
+
+
+@receiver([post_save, post_delete], sender=ProductCountOrder)
+def refresh_order_totals(sender, instance, **kwargs):
+    Order.objects.filter(pk=instance.order_id).refresh_totals()
@@ -0,0 +1,32 @@
+import json
+from decimal import Decimal
+from urllib.request import urlopen
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class BaseRateProvider:
+    def get_usd_to_uzs_rate(self) -> Decimal:
+        raise NotImplementedError
+
+
+class CBURateProvider(BaseRateProvider):
+    """Official rate published by the Central Bank of Uzbekistan."""
+    url = 'https://cbu.uz/uz/arkhiv-kursov-valyut/json/USD/'
+    timeout = 10
+
+    def get_usd_to_uzs_rate(self) -> Decimal:
+        with urlopen(self.url, timeout=self.timeout) as response:
+            data = json.load(response)
+        return Decimal(data[0]['Rate'])
+
+
+class StaticRateProvider(BaseRateProvider):
+    """Returns ``EXCHANGE_RATE_STATIC``; meant for tests and local development."""
+
+    def get_usd_to_uzs_rate(self) -> Decimal:
+        return Decimal(str(settings.EXCHANGE_RATE_STATIC))
+
+
+def get_rate_provider() -> BaseRateProvider:
+    return import_string(settings.EXCHANGE_RATE_PROVIDER)()
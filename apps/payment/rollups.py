@@ -0,0 +1,59 @@
+from datetime import datetime, time, timedelta
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+from django.db.models.functions import TruncDate
+from .models import DailySalesRollup, Order, ProductCountOrder, RollupWatermark
+
+WATERMARK_NAME = 'daily_sales'
+# Re-read a little before the watermark so rows committed late by long
+# transactions are not missed; rebuilding a day is idempotent.
+WATERMARK_OVERLAP = timedelta(minutes=5)
+DAYS_PER_BATCH = 31
+
+
+def _day_range(day):
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, start + timedelta(days=1)
+
+
+def changed_days(since=None):
+    orders = Order.objects.all() if since is None else Order.objects.filter(update_at__gt=since)
+    return sorted(orders.annotate(day=TruncDate('created_at')).values_list('day', flat=True).order_by().distinct())
+
+
+def rebuild_days(days):
+    """Recomputes the rollups of whole days from the order lines with one aggregate query."""
+    in_days = Q()
+    for day in days:
+        start, end = _day_range(day)
+        in_days |= Q(order__created_at__gte=start, order__created_at__lt=end)
+    rows = ProductCountOrder.objects.filter(in_days).annotate(day=TruncDate('order__created_at')).values(
+        'day', 'product_id', 'order__branch_id', 'order__provider', 'order__status'
+    ).annotate(total_quantity=Sum('quantity'), total_amount=Sum('amount'), orders=Count('order', distinct=True)).order_by()
+    with transaction.atomic():
+        DailySalesRollup.objects.filter(date__in=days).delete()
+        DailySalesRollup.objects.bulk_create([
+            DailySalesRollup(
+                date=row['day'], product_id=row['product_id'], branch_id=row['order__branch_id'],
+                provider=row['order__provider'], status=row['order__status'], quantity=row['total_quantity'],
+                amount=row['total_amount'], orders_count=row['orders'],
+            )
+            for row in rows
+        ], batch_size=1000)
+
+
+def update_sales_rollups():
+    """
+    Rebuilds every day that has an order created or changed since the last
+    run, then advances the watermark. Returns the number of days rebuilt.
+    """
+    with transaction.atomic():
+        watermark, _ = RollupWatermark.objects.select_for_update().get_or_create(name=WATERMARK_NAME)
+        started = timezone.now()
+        days = changed_days(watermark.value - WATERMARK_OVERLAP if watermark.value else None)
+        for i in range(0, len(days), DAYS_PER_BATCH):
+            rebuild_days(days[i:i + DAYS_PER_BATCH])
+        watermark.value = started
+        watermark.save(update_fields=['value'])
+    return len(days)
@@ -0,0 +1,39 @@
+from celery import shared_task
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Now
+from apps.common.models import Product, Section
+from apps.common.cache import bump_version_on_commit
+from apps.common.feeds import schedule_section_feeds
+from .dispatch import plan_all_branches, plan_branch
+from .models import Branch, Settings
+from .rates import get_rate_provider
+from .rollups import update_sales_rollups
+
+
+@shared_task
+def update_usd_to_uzs_rate():
+    rate = get_rate_provider().get_usd_to_uzs_rate()
+    with transaction.atomic():
+        site_settings = Settings.get_solo()
+        site_settings.usd_to_uzs_rate = rate
+        site_settings.save(update_fields=['usd_to_uzs_rate', 'last_updated', 'update_at'])
+        # One set-based UPDATE for the whole catalog.
+        Product.objects.update(price_uzs=F('price') * rate, update_at=Now())
+        bump_version_on_commit('product')
+        # Feed cards embed price_uzs and aren't keyed on the 'product' version.
+        schedule_section_feeds(Section.objects.values_list('code', flat=True))
+    return str(rate)
+
+
+@shared_task
+def update_daily_sales_rollups():
+    return update_sales_rollups()
+
+
+@shared_task
+def plan_courier_batches(branch_id=None):
+    """Plans courier batches for one branch, or for every active branch."""
+    if branch_id is None:
+        return plan_all_branches()
+    return {branch_id: plan_branch(Branch.objects.get(pk=branch_id))}
@@ -1,3 +1,274 @@
-from django.test import TestCase
+import io
+import csv
+import threading
+from decimal import Decimal
+from django.db import OperationalError, connection
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.test import TestCase, TransactionTestCase, override_settings
+from apps.users.models import User
+from apps.common.feeds import get_section_feed
+from apps.common.models import Category, Product, Section
+from django.urls import reverse
+from django.core.management import call_command
+from .dispatch import get_plan, plan_batches, plan_branch
+from .geo import branch_index, clear_branch_index
+from .models import Branch, DailySalesRollup, Order, ProductCountOrder, Settings
+from .rollups import update_sales_rollups
+from .tasks import update_usd_to_uzs_rate
 
-# Create your tests here.
+
+def create_order(user, *lines):
+    order = Order.objects.create(user=user, phone_number='+998901234567')
+    for product, quantity in lines:
+        ProductCountOrder.objects.create(order=order, product=product, quantity=quantity, amount=quantity * 10)
+    return order
+
+
+class ReserveStockTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(title='Phones')
+        cls.user = User.objects.create(phone='+998901234567')
+        cls.phone = Product.objects.create(title='Phone', price=100, quantity=5, category=category)
+        cls.case = Product.objects.create(title='Case', price=5, quantity=1, category=category)
+
+    def approve(self, order):
+        order.status = Order.OrderStatus.APPROVED
+        order.save()
+
+    def test_approval_decrements_every_line(self):
+        order = create_order(self.user, (self.phone, 2), (self.phone, 1), (self.case, 1))
+        self.approve(order)
+        self.phone.refresh_from_db()
+        self.case.refresh_from_db()
+        self.assertEqual((self.phone.quantity, self.case.quantity), (2, 0))
+
+    def test_shortage_rolls_back_the_whole_order(self):
+        order = create_order(self.user, (self.phone, 2), (self.case, 2))
+        with self.assertRaises(ValidationError):
+            self.approve(order)
+        self.phone.refresh_from_db()
+        order.refresh_from_db()
+        self.assertEqual(self.phone.quantity, 5)
+        self.assertEqual(order.status, Order.OrderStatus.PENDING)
+
+    def test_saving_an_approved_order_again_does_not_reserve_twice(self):
+        order = create_order(self.user, (self.phone, 2))
+        self.approve(order)
+        order.save()
+        self.phone.refresh_from_db()
+        self.assertEqual(self.phone.quantity, 3)
+
+
+class ReserveStockConcurrencyTest(TransactionTestCase):
+    def test_parallel_approvals_never_oversell(self):
+        category = Category.objects.create(title='Phones')
+        user = User.objects.create(phone='+998901234567')
+        product = Product.objects.create(title='Phone', price=100, quantity=10, category=category)
+        orders = [create_order(user, (product, 3)) for _ in range(8)]
+        # Every order is also approved twice to race on the same row.
+        orders += orders
+        barrier = threading.Barrier(len(orders))
+        errors = []
+
+        def approve(order_id):
+            order = Order.objects.get(pk=order_id)
+            order.status = Order.OrderStatus.APPROVED
+            barrier.wait()
+            try:
+                order.save()
+            except (ValidationError, OperationalError):
+                # A shortage, or SQLite refusing a second concurrent writer.
+                pass
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=approve, args=(order.pk,)) for order in orders]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        product.refresh_from_db()
+        reserved = Order.objects.filter(status=Order.OrderStatus.APPROVED).count()
+        self.assertEqual(errors, [])
+        self.assertGreaterEqual(product.quantity, 0)
+        self.assertEqual(product.quantity, 10 - 3 * reserved)
+        self.assertLessEqual(reserved, 3)
+
+
+class OrderTotalsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(title='Phones')
+        cls.user = User.objects.create(phone='+998901234567')
+        cls.product = Product.objects.create(title='Phone', price=100, quantity=5, category=category)
+
+    def test_totals_follow_order_lines(self):
+        order = create_order(self.user, (self.product, 2), (self.product, 1))
+        order.total_amount = 50
+        order.save()
+        self.assertEqual(order.amounts, {'product_amount': 30, 'shipping_amount': 20})
+        order.product_orders.first().delete()
+        order.refresh_from_db()
+        self.assertEqual(order.amounts, {'product_amount': 10, 'shipping_amount': 40})
+
+    def test_with_totals_annotates_many_orders_in_one_query(self):
+        for _ in range(5):
+            create_order(self.user, (self.product, 1), (self.product, 2))
+        with self.assertNumQueries(1):
+            totals = [order.product_total for order in Order.objects.with_totals()]
+        self.assertEqual(totals, [30] * 5)
+
+
+@override_settings(EXCHANGE_RATE_STATIC='12000.50')
+class UpdateUsdToUzsRateTest(TestCase):
+    def setUp(self):
+        Settings.clear_solo_cache()
+        cache.clear()
+
+    def test_rate_is_stored_and_catalog_repriced(self):
+        category = Category.objects.create(title='Phones')
+        products = [Product.objects.create(title='Phone', price=price, category=category) for price in (10, 2)]
+        # savepoint pair, settings write, one UPDATE for the catalog, section
+        # codes; the settings row itself comes from the solo cache
+        with self.assertNumQueries(5):
+            update_usd_to_uzs_rate()
+        self.assertEqual(Settings.objects.get().usd_to_uzs_rate, Decimal('12000.50'))
+        prices = Product.objects.filter(pk__in=[p.pk for p in products]).order_by('pk').values_list('price_uzs', flat=True)
+        self.assertEqual(list(prices), [Decimal('120005.00'), Decimal('24001.00')])
+        self.assertTrue(all(product.update_at < updated for product, updated in zip(
+            products, Product.objects.filter(pk__in=[p.pk for p in products]).order_by('pk')
+            .values_list('update_at', flat=True))))
+
+    def test_section_feeds_are_rebuilt_with_new_prices(self):
+        category = Category.objects.create(title='Phones')
+        product = Product.objects.create(title='Phone', price=10, quantity=1, category=category)
+        section = Section.objects.create(name='Hits')
+        section.products.add(product)
+        self.assertEqual(get_section_feed(section.code)['products'][0]['price_uzs'], None)
+        with self.captureOnCommitCallbacks(execute=True):
+            update_usd_to_uzs_rate()
+        self.assertEqual(get_section_feed(section.code)['products'][0]['price_uzs'], '120005.00')
+
+    def test_missing_settings_row_is_created(self):
+        Settings.objects.all().delete()
+        update_usd_to_uzs_rate()
+        self.assertEqual(Settings.objects.get().usd_to_uzs_rate, Decimal('12000.50'))
+
+
+class SettingsSoloTest(TestCase):
+    def setUp(self):
+        Settings.clear_solo_cache()
+
+    def test_steady_state_reads_cost_no_queries(self):
+        Settings.get_solo()
+        with self.assertNumQueries(0):
+            self.assertEqual(Settings.get_solo().minute, 0)
+
+    def test_saving_invalidates_the_local_copy(self):
+        site_settings = Settings.get_solo()
+        site_settings.minute = 15
+        with self.captureOnCommitCallbacks(execute=True):
+            site_settings.save()
+        self.assertEqual(Settings.get_solo().minute, 15)
+        self.assertIsNot(Settings.get_solo(), site_settings)
+
+
+class SalesRollupTest(TestCase):
+    def test_rollups_follow_order_changes(self):
+        category = Category.objects.create(title='Phones')
+        user = User.objects.create(phone='+998901234567')
+        product = Product.objects.create(title='Phone', price=100, quantity=10, category=category)
+        order = create_order(user, (product, 2))
+        self.assertEqual(update_sales_rollups(), 1)
+        rollup = DailySalesRollup.objects.get()
+        self.assertEqual((rollup.status, rollup.quantity, rollup.amount), ('pending', 2, 20))
+
+        order.status = Order.OrderStatus.APPROVED
+        order.save()
+        ProductCountOrder.objects.create(order=order, product=product, quantity=1, amount=10)
+        update_sales_rollups()
+        rollup = DailySalesRollup.objects.get()
+        self.assertEqual((rollup.status, rollup.quantity, rollup.amount, rollup.orders_count), ('approved', 3, 30, 1))
+
+    def test_dashboard_renders(self):
+        admin = User.objects.create(phone='+998901234568', is_staff=True, is_superuser=True)
+        self.client.force_login(admin)
+        response = self.client.get(reverse('admin:payment_dailysalesrollup_changelist'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Top products')
+
+
+class NearestBranchTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(phone='+998901234567')
+        cls.chilonzor = Branch.objects.create(name='Chilonzor', latitude=41.2756, longitude=69.2034)
+        cls.yunusobod = Branch.objects.create(name='Yunusobod', latitude=41.3640, longitude=69.2870)
+        Branch.objects.create(name='Closed', latitude=41.3111, longitude=69.2797, archive=True)
+        Branch.objects.create(name='Samarkand', latitude=39.6542, longitude=66.9597)
+
+    def setUp(self):
+        clear_branch_index()
+
+    def test_nearest_k_skips_archived_branches(self):
+        nearest = branch_index().nearest(41.3111, 69.2797, k=2)
+        self.assertEqual([pk for pk, _ in nearest], [self.yunusobod.pk, self.chilonzor.pk])
+        self.assertAlmostEqual(nearest[0][1], 5.9, places=1)
+
+    def test_order_is_assigned_to_the_closest_branch(self):
+        order = Order.objects.create(user=self.user, phone_number='+998901234567', latitude=41.28, longitude=69.21)
+        self.assertEqual(order.branch, self.chilonzor)
+
+
+class DispatchPlanTest(TestCase):
+    def test_batches_follow_the_clusters_around_the_branch(self):
+        north = [(pk, 41.40 + pk / 1000, 69.28) for pk in (1, 2, 3)]
+        south = [(pk, 41.20 - pk / 1000, 69.28) for pk in (4, 5, 6)]
+        batches = plan_batches(41.31, 69.28, north + south, size=3)
+        self.assertEqual(sorted(sorted(batch['orders']) for batch in batches), [[1, 2, 3], [4, 5, 6]])
+        # Each courier drives out to the closest stop first.
+        self.assertIn(batches[0]['orders'], ([1, 2, 3], [4, 5, 6]))
+
+    def test_plan_branch_only_takes_approved_new_deliveries(self):
+        user = User.objects.create(phone='+998901234567')
+        branch = Branch.objects.create(name='Chilonzor', latitude=41.2756, longitude=69.2034)
+        orders = [
+            Order.objects.create(user=user, phone_number='+998901234567', branch=branch,
+                                 latitude=41.28, longitude=69.21, **fields)
+            for fields in ({'status': Order.OrderStatus.APPROVED}, {},
+                           {'status': Order.OrderStatus.APPROVED, 'order_type': Order.OrderType.TAKE_AWAY})
+        ]
+        self.assertEqual(plan_branch(branch), [{'orders': [orders[0].pk], 'distance': 0.74}])
+        self.assertEqual(get_plan(branch.pk)[0]['orders'], [orders[0].pk])
+
+
+class OrderExportTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(title='Phones')
+        cls.user = User.objects.create(phone='+998901234567', is_staff=True)
+        cls.phone = Product.objects.create(title='Phone', price=100, quantity=5, category=category)
+        cls.case = Product.objects.create(title='Case', price=5, quantity=5, category=category)
+        cls.order = create_order(cls.user, (cls.phone, 1), (cls.case, 2))
+        cls.empty = Order.objects.create(user=cls.user, phone_number='+998901234567', provider='click')
+
+    def test_command_writes_a_row_per_line(self):
+        out = io.StringIO()
+        call_command('export_orders', '--provider', 'cash', stdout=out)
+        rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+        self.assertEqual([(row['order_id'], row['product'], row['quantity']) for row in rows],
+                         [(str(self.order.pk), 'Phone', '1'), (str(self.order.pk), 'Case', '2')])
+
+    def test_view_streams_csv_to_staff_only(self):
+        url = reverse('order-export')
+        self.assertEqual(self.client.get(url).status_code, 401)
+        self.client.force_login(self.user)
+        response = self.client.get(url, {'provider': 'click'})
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual([(row['order_id'], row['product']) for row in rows], [(str(self.empty.pk), '')])
+        self.assertEqual(self.client.get(url, {'date_from': 'yesterday'}).status_code, 400)
@@ -0,0 +1,6 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('orders/export/', views.OrderExportAPIView.as_view(), name='order-export'),
+]
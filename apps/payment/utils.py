@@ -1,2 +1,32 @@
+from django.db import transaction
+from django.db.models import Case, F, Q, Sum, When
+from django.core.exceptions import ValidationError
+from django.utils.translation import gettext_lazy as _
+
+
 def check_quantity(order) -> bool:
-    return all(map(lambda x: x.product.quntity >= x.quantity, order.product_orders.all()))
\ No newline at end of file
+    return all(map(lambda x: x.product.quantity >= x.quantity, order.product_orders.all().select_related('product')))
+
+
+def reserve_stock(order):
+    """
+    Checks and decrements the stock of every product in ``order`` with a single
+    conditional UPDATE. A product is only touched while ``quantity >= n``, so
+    if fewer rows than products are updated somebody else took the stock and
+    the whole reservation is rolled back.
+    """
+    from apps.common.models import Product
+
+    lines = dict(order.product_orders.values_list('product_id').annotate(total=Sum('quantity')))
+    if not lines:
+        return
+    available = Q()
+    for product_id, quantity in lines.items():
+        available |= Q(pk=product_id, quantity__gte=quantity)
+    with transaction.atomic():
+        updated = Product.objects.filter(available).update(
+            quantity=Case(*[When(pk=product_id, then=F('quantity') - quantity)
+                            for product_id, quantity in lines.items()])
+        )
+        if updated != len(lines):
+            raise ValidationError(_('There is a shortage of products in the warehouse'))
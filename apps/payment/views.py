@@ -1,3 +1,19 @@
-from django.shortcuts import render
+from django.http import StreamingHttpResponse
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAdminUser
+from rest_framework.views import APIView
+from .exports import export_order_rows, export_queryset, render_csv
 
-# Create your views here.
+
+class OrderExportAPIView(APIView):
+    """Streams the filtered orders with their lines as CSV."""
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        try:
+            queryset = export_queryset(request.query_params)
+        except ValueError as exc:
+            raise ValidationError(exc.args[0])
+        response = StreamingHttpResponse(render_csv(export_order_rows(queryset)), content_type='text/csv')
+        response['Content-Disposition'] = 'attachment; filename="orders.csv"'
+        return response
@@ -1,3 +1,4 @@
+from . import otp
 from .models import User
 from django.contrib import admin
 from django.utils.translation import gettext_lazy as _
@@ -10,7 +11,7 @@ class UserAdmin(admin.ModelAdmin):
     list_display_links = 'id', 'first_name', 'phone'
 
     def code(self, obj):
-        return obj.verify_code.code
+        return otp.peek_code(str(obj.phone))
 
     def is_active_(self, obj):
         return obj.auth_status == 'code_verified'
@@ -18,6 +19,3 @@ class UserAdmin(admin.ModelAdmin):
     code.short_description = _("Code")
     is_active_.short_description = _("Is Active")
 
-    def get_queryset(self, request):
-        return super().get_queryset(request).prefetch_related('verify_code')
-
@@ -0,0 +1,94 @@
+import copy
+import time
+import threading
+from collections import OrderedDict
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+TOKEN_VERSION_CLAIM = 'ver'
+USER_CACHE_TIMEOUT = 5 * 60
+# Other workers can't be told to drop their local copies, so keep them short-lived.
+LOCAL_CACHE_TIMEOUT = 30
+LOCAL_CACHE_SIZE = 1024
+
+
+def user_cache_key(user_id, version):
+    return f'auth:user:{user_id}:{version}'
+
+
+class LocalUserCache:
+    """Small thread-safe LRU with per-entry expiry."""
+
+    def __init__(self, maxsize=LOCAL_CACHE_SIZE, timeout=LOCAL_CACHE_TIMEOUT):
+        self.maxsize, self.timeout = maxsize, timeout
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, user):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.timeout, user)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+local_users = LocalUserCache()
+
+
+def forget_user(user_id, version):
+    key = user_cache_key(user_id, version)
+    local_users.delete(key)
+    cache.delete(key)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    Resolves the user of an access token from an in-process LRU, then Redis,
+    and only then the database. Entries are keyed by user id and the token's
+    ``ver`` claim; ``User.token_version`` is bumped whenever the password,
+    ``is_active`` or ``auth_status`` changes, which also revokes older tokens.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            return super().get_user(validated_token)
+        version = validated_token.get(TOKEN_VERSION_CLAIM, 0)
+        key = user_cache_key(user_id, version)
+
+        user = local_users.get(key)
+        if user is None:
+            user = cache.get(key)
+            if user is None:
+                user = super().get_user(validated_token)
+                if user.token_version != version:
+                    raise AuthenticationFailed(_("Token has been revoked"), code="token_revoked")
+                cache.set(key, user, USER_CACHE_TIMEOUT)
+            local_users.set(key, user)
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        # Requests must not share (and mutate) the cached instance.
+        return copy.copy(user)
@@ -0,0 +1,16 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:11
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_user_token_version'),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name='UserConfirmation',
+        ),
+    ]
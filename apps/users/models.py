@@ -1,7 +1,4 @@
-import random
-from django.db import models
-from datetime import timedelta
-from django.utils import timezone
+from django.db import models, transaction
 from apps.common.models import BaseModel
 from django.utils.translation import gettext_lazy as _
 from rest_framework_simplejwt.tokens import RefreshToken
@@ -12,18 +9,6 @@ NEW, CODE_VERIFIED = ('new', 'code_verified',)
 PHONE_EXPIRE = 2
 
 
-class UserConfirmation(models.Model):
-    code = models.CharField(max_length=4)
-    user = models.OneToOneField('users.User', on_delete=models.CASCADE, related_name="verify_code")
-    expiration_time = models.DateTimeField(null=True)
-    is_confirmed = models.BooleanField(default=False)
-
-    def save(self, *args, **kwargs):
-        if not self.pk:
-            self.expiration_time = timezone.now() + timedelta(minutes=PHONE_EXPIRE)
-        super(UserConfirmation, self).save(*args, **kwargs)
-
-
 class AbstractUserManager(UserManager):
     def _create_user(self, phone, password, **extra_fields):
         if not phone:
@@ -63,29 +48,57 @@ class User(AbstractUser, BaseModel):
 
     phone = PhoneNumberField(unique=True, verbose_name=_("Phone"))
     auth_status = models.CharField(max_length=25, choices=AUTH_STATUS, default=NEW, verbose_name=_("Auth_status"))
+    token_version = models.PositiveIntegerField(default=0, editable=False, verbose_name=_("Token version"))
     objects = UserManager()
     USERNAME_FIELD = "phone"
 
+    # Changing any of these revokes issued tokens and cached authentications.
+    TOKEN_VERSION_FIELDS = ('password', 'is_active', 'auth_status')
+
     class Meta:
         verbose_name = _("User")
 
     def __str__(self):
         return f"{self.first_name} || {self.phone}"
 
-    def create_verify_code(self):
-        code = "".join(str(random.randint(0, 100) % 10) for _ in range(4))
-        if hasattr(self, "verify_code"):
-            user_confirmation = self.verify_code
-            user_confirmation.code = code
-            user_confirmation.expiration_time = timezone.now() + timedelta(minutes=PHONE_EXPIRE)
-            user_confirmation.is_confirmed = False
-            user_confirmation.save()
-        else:
-            UserConfirmation.objects.create(user=self, code=code)
-        return code
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._token_state = instance._get_token_state()
+        return instance
+
+    def _get_token_state(self):
+        return tuple(getattr(self, field, None) for field in self.TOKEN_VERSION_FIELDS)
+
+    def save(self, *args, **kwargs):
+        from .authentication import forget_user
+
+        old_version = self.token_version
+        if self.pk and getattr(self, '_token_state', None) not in (None, self._get_token_state()):
+            self.token_version += 1
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'token_version'}
+        super().save(*args, **kwargs)
+        self._token_state = self._get_token_state()
+        if self.pk:
+            transaction.on_commit(lambda: forget_user(self.pk, old_version))
+
+    def create_verify_code(self, ip=None):
+        from . import otp
+
+        return otp.send_code(str(self.phone), ip)
+
+    def check_verify_code(self, code, ip=None):
+        from . import otp
+
+        return otp.verify_code(str(self.phone), code, ip)
 
     def tokens(self):
+        from .authentication import TOKEN_VERSION_CLAIM
+
         refresh = RefreshToken.for_user(self)
+        refresh[TOKEN_VERSION_CLAIM] = self.token_version
         return {
             "refresh": str(refresh),
             "access": str(refresh.access_token),
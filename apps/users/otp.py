@@ -0,0 +1,89 @@
+import hmac
+import secrets
+from rest_framework.exceptions import Throttled
+from apps.common.redis_client import get_redis
+from .models import PHONE_EXPIRE
+
+CODE_LENGTH = 4
+CODE_TTL = PHONE_EXPIRE * 60
+MAX_ATTEMPTS = 5
+RESEND_COOLDOWN = 60
+# (limit, window in seconds)
+PHONE_SEND_LIMIT = (5, 60 * 60)
+IP_SEND_LIMIT = (20, 60 * 60)
+IP_VERIFY_LIMIT = (30, 60 * 60)
+
+
+def _code_key(phone):
+    return f'otp:code:{phone}'
+
+
+def _hit(key, limit, window):
+    """Fixed-window counter: returns ``None`` while under ``limit``, else the seconds to wait."""
+    pipe = get_redis().pipeline()
+    pipe.set(key, 0, ex=window, nx=True)
+    pipe.incr(key)
+    pipe.ttl(key)
+    _, count, ttl = pipe.execute()
+    return max(ttl, 1) if count > limit else None
+
+
+def _throttle(*checks):
+    for key, (limit, window) in checks:
+        wait = _hit(key, limit, window)
+        if wait is not None:
+            raise Throttled(wait=wait)
+
+
+def send_code(phone, ip=None):
+    """
+    Issues a new code for ``phone`` with a native Redis TTL. Raises
+    ``Throttled`` during the resend cooldown or when the phone or IP has
+    requested too many codes.
+    """
+    client = get_redis()
+    if not client.set(f'otp:cooldown:{phone}', 1, ex=RESEND_COOLDOWN, nx=True):
+        raise Throttled(wait=max(client.ttl(f'otp:cooldown:{phone}'), 1))
+    checks = [(f'otp:send:phone:{phone}', PHONE_SEND_LIMIT)]
+    if ip:
+        checks.append((f'otp:send:ip:{ip}', IP_SEND_LIMIT))
+    _throttle(*checks)
+    code = f'{secrets.randbelow(10 ** CODE_LENGTH):0{CODE_LENGTH}d}'
+    pipe = client.pipeline()
+    pipe.delete(_code_key(phone))
+    pipe.hset(_code_key(phone), mapping={'code': code, 'attempts': 0})
+    pipe.expire(_code_key(phone), CODE_TTL)
+    pipe.execute()
+    return code
+
+
+def verify_code(phone, code, ip=None):
+    """
+    Checks ``code`` in constant time without touching the database. A code is
+    burnt after a successful check or ``MAX_ATTEMPTS`` wrong guesses.
+    """
+    if ip:
+        _throttle((f'otp:verify:ip:{ip}', IP_VERIFY_LIMIT))
+    code = str(code)
+    # compare_digest rejects non-ASCII strings, and such a code can't match anyway.
+    if len(code) != CODE_LENGTH or not (code.isascii() and code.isdigit()):
+        return False
+    client = get_redis()
+    pipe = client.pipeline()
+    pipe.hget(_code_key(phone), 'code')
+    pipe.hincrby(_code_key(phone), 'attempts', 1)
+    stored, attempts = pipe.execute()
+    if stored is None:
+        client.delete(_code_key(phone))
+        return False
+    if attempts > MAX_ATTEMPTS:
+        client.delete(_code_key(phone))
+        return False
+    if hmac.compare_digest(stored, code):
+        client.delete(_code_key(phone))
+        return True
+    return False
+
+
+def peek_code(phone):
+    return get_redis().hget(_code_key(phone), 'code')
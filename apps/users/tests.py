@@ -1,3 +1,97 @@
+from unittest import mock
+from fakeredis import FakeRedis
 from django.test import TestCase
+from rest_framework.test import APIRequestFactory
+from rest_framework.exceptions import AuthenticationFailed, Throttled
+from . import otp
+from .models import User
+from .authentication import CachedJWTAuthentication, local_users
 
-# Create your tests here.
+
+class CachedJWTAuthenticationTest(TestCase):
+    def setUp(self):
+        local_users.clear()
+        self.user = User.objects.create(phone='+998901234567')
+        self.user = User.objects.get(pk=self.user.pk)
+
+    def authenticate(self, access):
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {access}')
+        return CachedJWTAuthentication().authenticate(request)[0]
+
+    def test_authenticated_reads_need_no_query(self):
+        access = self.user.tokens()['access']
+        self.assertEqual(self.authenticate(access), self.user)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.authenticate(access), self.user)
+
+    def test_password_change_revokes_tokens(self):
+        access = self.user.tokens()['access']
+        self.authenticate(access)
+        self.user.set_password('new-password')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(access)
+        self.assertEqual(self.authenticate(self.user.tokens()['access']), self.user)
+
+    def test_profile_change_refreshes_cached_user(self):
+        access = self.user.tokens()['access']
+        self.authenticate(access)
+        self.user.first_name = 'Ali'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        self.assertEqual(self.authenticate(access).first_name, 'Ali')
+
+
+class OTPTest(TestCase):
+    def setUp(self):
+        self.redis = FakeRedis(decode_responses=True)
+        patcher = mock.patch('apps.users.otp.get_redis', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.phone = '+998901234567'
+
+    def test_code_is_used_once(self):
+        code = otp.send_code(self.phone)
+        self.assertEqual(self.redis.ttl(f'otp:code:{self.phone}'), otp.CODE_TTL)
+        self.assertTrue(otp.verify_code(self.phone, code))
+        self.assertFalse(otp.verify_code(self.phone, code))
+
+    def test_expired_code_is_rejected(self):
+        code = otp.send_code(self.phone)
+        self.redis.delete(f'otp:code:{self.phone}')
+        self.assertFalse(otp.verify_code(self.phone, code))
+
+    def test_code_is_burnt_after_max_attempts(self):
+        code = otp.send_code(self.phone)
+        wrong = f'{(int(code) + 1) % 10 ** otp.CODE_LENGTH:0{otp.CODE_LENGTH}d}'
+        for _ in range(otp.MAX_ATTEMPTS):
+            self.assertFalse(otp.verify_code(self.phone, wrong))
+        self.assertFalse(otp.verify_code(self.phone, code))
+        self.assertIsNone(otp.peek_code(self.phone))
+
+    def test_malformed_codes_are_rejected(self):
+        otp.send_code(self.phone)
+        for code in ('١٢٣٤', '12', '12345', 'abcd', None):
+            self.assertFalse(otp.verify_code(self.phone, code))
+
+    def test_resend_cooldown_and_phone_limit(self):
+        otp.send_code(self.phone)
+        with self.assertRaises(Throttled):
+            otp.send_code(self.phone)
+        limit, _ = otp.PHONE_SEND_LIMIT
+        for _ in range(limit - 1):
+            self.redis.delete(f'otp:cooldown:{self.phone}')
+            otp.send_code(self.phone)
+        self.redis.delete(f'otp:cooldown:{self.phone}')
+        with self.assertRaises(Throttled):
+            otp.send_code(self.phone)
+
+    def test_ip_send_limit_spans_phones(self):
+        limit, _ = otp.IP_SEND_LIMIT
+        for i in range(limit):
+            otp.send_code(f'+99890000{i:04d}', ip='10.0.0.1')
+        with self.assertRaises(Throttled) as caught:
+            otp.send_code('+998909999999', ip='10.0.0.1')
+        self.assertGreater(caught.exception.wait, 0)
+        otp.send_code('+998908888888', ip='10.0.0.2')
@@ -15,9 +15,25 @@ app.autodiscover_tasks()
 
 app.conf.beat_schedule = {
     'update-usd-to-uzs-rate-every-24-hours': {
-        'task': 'path.to.update_usd_to_uzs_rate',
+        'task': 'apps.payment.tasks.update_usd_to_uzs_rate',
         'schedule': crontab(minute=0, hour=0),
     },
+    'flush-product-view-counts-every-minute': {
+        'task': 'apps.common.tasks.flush_product_view_counts',
+        'schedule': crontab(),
+    },
+    'snapshot-online-users-every-5-minutes': {
+        'task': 'apps.common.tasks.snapshot_online_users',
+        'schedule': crontab(minute='*/5'),
+    },
+    'update-daily-sales-rollups-every-10-minutes': {
+        'task': 'apps.payment.tasks.update_daily_sales_rollups',
+        'schedule': crontab(minute='*/10'),
+    },
+    'delete-queued-media-files-every-5-minutes': {
+        'task': 'apps.common.tasks.delete_queued_media_files',
+        'schedule': crontab(minute='*/5'),
+    },
 }
 
 app.conf.timezone = 'UTC'
\ No newline at end of file
@@ -0,0 +1,11 @@
+from .develop import *  # noqa
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
+EXCHANGE_RATE_PROVIDER = "apps.payment.rates.StaticRateProvider"
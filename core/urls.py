@@ -1,12 +1,15 @@
 from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import path
+from django.urls import include, path
 
 from .schema import swagger_urlpatterns
 
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("api/v1/common/async/", include("apps.common.async_urls")),
+    path("api/v1/common/", include("apps.common.urls")),
+    path("api/v1/payment/", include("apps.payment.urls")),
 ]
 
 urlpatterns += swagger_urlpatterns